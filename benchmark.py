@@ -0,0 +1,250 @@
+import argparse
+import csv
+import inspect
+import json
+import time
+import tracemalloc
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import deap_solver
+import deap_solver_dependency
+import deap_test
+from calendar_scheduler import forward_schedule
+from pipeline import to_pulp_input
+from production_calendar import ProductionCalendar
+from pulp_solver import pulp_solve
+
+BACKENDS = ('pulp', 'pso', 'pso_levels', 'deap_test')
+# deap_test indexes its fixed population of 10 particles by job position, so it fails on larger plans
+DEAP_TEST_MAX_JOBS = 10
+# Slack allowed between a dependency's end and its dependent's start; the MILP solver returns times that
+# are only feasible within its own tolerances
+PRECEDENCE_TOLERANCE = 1e-6
+REPORT_FIELDS = ('backend', 'jobs', 'depth', 'fan_out', 'resources', 'calendar_density', 'deadline_tightness',
+                 'seed', 'status', 'wall_time', 'peak_memory', 'makespan', 'tardiness', 'unscheduled',
+                 'precedence_violations')
+
+
+def generate_instance(jobs=100, depth=5, fan_out=2, resources=5, calendar_density=1.0, deadline_tightness=0.5,
+                      seed=0):
+    # Synthetic layered instance. Jobs are spread evenly over depth dependency levels and every job gets up
+    # to fan_out successors on the next level. calendar_density is the working fraction of each resource's
+    # day, and deadlines are the job's earliest finish divided by deadline_tightness (0 means no deadlines).
+    rng = np.random.default_rng(seed)
+    depth = max(1, min(depth, jobs))
+    levels = [1 + row * depth // jobs for row in range(jobs)]
+    layers = [[] for _ in range(depth + 1)]
+    for row, level in enumerate(levels):
+        layers[level].append(row)
+
+    dependencies = [[] for _ in range(jobs)]
+    for level in range(1, depth):
+        successors = layers[level + 1]
+        for row in layers[level]:
+            for successor in rng.choice(successors, size=min(fan_out, len(successors)), replace=False).tolist():
+                dependencies[successor].append(row + 1)
+
+    min_durations = rng.integers(1, 8, jobs)
+    max_durations = min_durations + rng.integers(0, 5, jobs)
+    records = []
+    earliest_finish = {}
+    for row in range(jobs):
+        job_id = row + 1
+        expected = (min_durations[row] + max_durations[row]) / 2
+        earliest_finish[job_id] = expected + max((earliest_finish[dep] for dep in dependencies[row]), default=0)
+        records.append({
+            'id': job_id,
+            'name': f"Job{job_id}",
+            'level': levels[row],
+            'min_duration': int(min_durations[row]),
+            'max_duration': int(max_durations[row]),
+            'resource': f"resource{rng.integers(1, resources + 1)}",
+            'dependencies': dependencies[row],
+            'deadline': earliest_finish[job_id] / deadline_tightness if deadline_tightness > 0 else None,
+        })
+
+    # Each resource works calendar_density of the day, starting at a random hour that keeps it within the day
+    hours = 24 * calendar_density
+    resource_periods = {}
+    for resource in range(1, resources + 1):
+        start = float(rng.uniform(0, 24 - hours))
+        resource_periods[f"resource{resource}"] = [(start, start + hours)]
+    return {'jobs': records, 'company_periods': [(0, 24)], 'resource_periods': resource_periods,
+            'calendar_density': calendar_density}
+
+
+def _calendars(instance):
+    return (ProductionCalendar(instance['company_periods']),
+            {resource: ProductionCalendar(periods) for resource, periods in instance['resource_periods'].items()})
+
+
+def _dependency_jobs(instance):
+    return [deap_solver_dependency.UncertainProductionJob(
+        record['id'], record['name'], record['min_duration'], record['max_duration'], {record['resource']: 1},
+        list(record['dependencies']), record['deadline']) for record in instance['jobs']]
+
+
+def _level_jobs(instance):
+    return [deap_solver.UncertainProductionJob(
+        record['id'], record['name'], record['level'], record['min_duration'], record['max_duration'],
+        {record['resource']: 1}, list(record['dependencies']), record['deadline']) for record in instance['jobs']]
+
+
+def _deap_test_jobs(instance):
+    # deap_test only schedules a job inside its time window, so the window spans the whole plan
+    horizon = sum(record['max_duration'] for record in instance['jobs'])
+    return [deap_solver_dependency.UncertainProductionJob(
+        record['id'], record['name'], record['min_duration'], record['max_duration'], {record['resource']: 1},
+        list(record['dependencies']), record['deadline'], time_window=(0, horizon)) for record in instance['jobs']]
+
+
+def run_pulp(instance, seed, pulp_options):
+    # Calendars that close part of the day need the time-indexed model; the continuous one ignores them
+    jobs = _dependency_jobs(instance)
+    pulp_jobs, dependencies = to_pulp_input(jobs)
+    options = {'msg': False}
+    if instance['calendar_density'] < 1:
+        company_calendar, resource_calendars = _calendars(instance)
+        options.update(formulation='time_indexed', company_calendar=company_calendar,
+                       resource_calendars=resource_calendars)
+    schedule = pulp_solve(pulp_jobs, dependencies, **dict(options, **pulp_options))
+    jobs_by_id = {job.id: job for job in jobs}
+    for tasks in (schedule or {}).values():
+        for task in tasks:
+            job = jobs_by_id[task['task_id']]
+            job.start_time, job.end_time = task['start_time'], task['end_time']
+    return jobs
+
+
+def run_pso(instance, seed, pulp_options):
+    company_calendar, resource_calendars = _calendars(instance)
+    return deap_solver_dependency.create_production_schedule(_dependency_jobs(instance), company_calendar,
+                                                             resource_calendars, use_calendars=True, seed=seed)
+
+
+def run_pso_levels(instance, seed, pulp_options):
+    # deap_solver has no calendar pass of its own; map its sequence onto the calendars like use_calendars does
+    company_calendar, resource_calendars = _calendars(instance)
+    jobs = deap_solver.create_production_schedule(_level_jobs(instance), company_calendar, resource_calendars,
+                                                  seed=seed)
+    return forward_schedule(jobs, company_calendar, resource_calendars,
+                            priority=lambda job: job.start_time if job.start_time is not None else 0)
+
+
+def run_deap_test(instance, seed, pulp_options):
+    company_calendar, resource_calendars = _calendars(instance)
+    with warnings.catch_warnings():
+        # deap_test re-creates the DEAP creator classes on every call
+        warnings.simplefilter('ignore', RuntimeWarning)
+        return deap_test.create_production_schedule(_deap_test_jobs(instance), company_calendar, resource_calendars,
+                                                    historical_data=[], seed=seed)
+
+
+RUNNERS = {'pulp': run_pulp, 'pso': run_pso, 'pso_levels': run_pso_levels, 'deap_test': run_deap_test}
+
+
+def schedule_metrics(jobs):
+    # Makespan, total tardiness, unscheduled jobs and broken dependencies of a scheduled job list
+    scheduled = {job.id: job for job in jobs if job.start_time is not None and job.end_time is not None}
+    return {
+        'makespan': max((job.end_time for job in scheduled.values()), default=0),
+        'tardiness': sum(max(0, job.end_time - job.deadline) for job in scheduled.values()
+                         if job.deadline is not None),
+        'unscheduled': len(jobs) - len(scheduled),
+        'precedence_violations': sum(1 for job in scheduled.values() for dep in job.dependencies
+                                     if dep in scheduled and scheduled[dep].end_time > job.start_time + PRECEDENCE_TOLERANCE),
+    }
+
+
+def measure(backend, instance, seed, pulp_options, trace_memory=False):
+    # One solve in the current process: wall time, status and schedule metrics, or only the peak traced
+    # memory when trace_memory is set (tracing slows the solve down, so it never shares a run with timing)
+    if trace_memory:
+        tracemalloc.start()
+    begin = time.perf_counter()
+    try:
+        jobs = RUNNERS[backend](instance, seed, pulp_options)
+        status = 'ok'
+    except Exception as error:
+        jobs, status = None, f"error: {error}"
+    wall_time = time.perf_counter() - begin
+    if trace_memory:
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return {'peak_memory': peak_memory}
+    if jobs is None:
+        return {'status': status, 'wall_time': wall_time}
+    result = dict(schedule_metrics(jobs), status=status, wall_time=wall_time)
+    if result['precedence_violations']:
+        result['status'] = 'infeasible'
+    elif result['unscheduled']:
+        result['status'] = 'incomplete'
+    return result
+
+
+def measure_isolated(*args, **kwargs):
+    # measure() in a fresh worker process, so no run sees state another backend left behind (deap_test
+    # re-creates DEAP creator classes, solvers keep caches) and memory peaks start from the same baseline
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        return executor.submit(measure, *args, **kwargs).result()
+
+
+def run_benchmark(sizes=(100,), backends=BACKENDS, repeats=1, pulp_options=None, **instance_options):
+    # One report row per instance size, backend and repeat. Every backend runs in its own process, once
+    # for wall time and schedule metrics and once more for peak traced memory.
+    rows = []
+    for size in sizes:
+        for seed in range(repeats):
+            parameters = inspect.signature(generate_instance).bind(jobs=size, seed=seed, **instance_options)
+            parameters.apply_defaults()
+            instance = generate_instance(*parameters.args, **parameters.kwargs)
+            for backend in backends:
+                row = dict(parameters.arguments, backend=backend)
+                if backend == 'deap_test' and size > DEAP_TEST_MAX_JOBS:
+                    row['status'] = f"skipped: deap_test supports at most {DEAP_TEST_MAX_JOBS} jobs"
+                    rows.append(row)
+                    continue
+                row.update(measure_isolated(backend, instance, seed, pulp_options or {}))
+                if not row['status'].startswith('error'):
+                    row.update(measure_isolated(backend, instance, seed, pulp_options or {}, trace_memory=True))
+                rows.append(row)
+    return rows
+
+
+def write_report(rows, path):
+    # CSV when the path ends in .csv, JSON otherwise
+    if path.lower().endswith('.csv'):
+        with open(path, 'w', newline='') as file:
+            writer = csv.DictWriter(file, fieldnames=REPORT_FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+    else:
+        with open(path, 'w') as file:
+            json.dump(rows, file, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the scheduling backends on synthetic instances")
+    parser.add_argument('--jobs', type=int, nargs='+', default=[100])
+    parser.add_argument('--backends', nargs='+', choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument('--depth', type=int, default=5)
+    parser.add_argument('--fan-out', type=int, default=2)
+    parser.add_argument('--resources', type=int, default=5)
+    parser.add_argument('--calendar-density', type=float, default=1.0)
+    parser.add_argument('--deadline-tightness', type=float, default=0.5)
+    parser.add_argument('--repeats', type=int, default=1)
+    parser.add_argument('--pulp-time-limit', type=float, default=60)
+    parser.add_argument('--output', default='benchmark_report.json')
+    args = parser.parse_args()
+
+    rows = run_benchmark(args.jobs, args.backends, args.repeats,
+                         pulp_options={'resource_mode': 'disjunctive', 'time_limit': args.pulp_time_limit},
+                         depth=args.depth, fan_out=args.fan_out, resources=args.resources,
+                         calendar_density=args.calendar_density, deadline_tightness=args.deadline_tightness)
+    write_report(rows, args.output)
+    for row in rows:
+        print(f"{row['backend']:>10} {row['jobs']:>6} jobs: {row.get('wall_time', 0):.2f} s, "
+              f"makespan {row.get('makespan')}, tardiness {row.get('tardiness')}, {row['status']}")
@@ -0,0 +1,50 @@
+from precedence import PrecedenceGraph
+from production_calendar import as_working_time_calendar
+
+
+def calendar_lookup(company_calendar, resource_calendars):
+    # Function job -> working-time calendar shared by the company and all of the job's resources (None when
+    # there are no calendars at all); the intersections are built once per resource combination
+    company_calendar = as_working_time_calendar(company_calendar)
+    resource_calendars = {resource: as_working_time_calendar(calendar)
+                          for resource, calendar in (resource_calendars or {}).items()}
+    combined_calendars = {}
+
+    def calendar_for(job):
+        key = tuple(resource for resource in job.resource_requirements if resource in resource_calendars)
+        if key not in combined_calendars:
+            calendars = [resource_calendars[resource] for resource in key]
+            if company_calendar is not None:
+                calendars.insert(0, company_calendar)
+            combined_calendars[key] = calendars[0].intersection(*calendars[1:]) if calendars else None
+        return combined_calendars[key]
+
+    return calendar_for
+
+
+def forward_schedule(jobs, company_calendar, resource_calendars, priority=None):
+    # Place jobs on the wall clock: every job starts when its dependencies are finished and its resources
+    # are free, at the first working time shared by the company calendar and the calendars of all its
+    # resources, and its duration is counted in working time only. Jobs are taken in topological order,
+    # ties broken by priority(job) (lower first) when given.
+    graph = PrecedenceGraph(jobs)
+    calendar_for = calendar_lookup(company_calendar, resource_calendars)
+
+    order = graph.order if priority is None else graph.priority_order(priority)
+
+    resource_free = {}
+    for job_id in order:
+        job = graph.job(job_id)
+        job.actual_duration = (job.min_duration + job.max_duration) / 2
+        ready = max([graph.job(dep).end_time for dep in graph.predecessors(job_id)] +
+                    [resource_free.get(resource, 0) for resource in job.resource_requirements] + [0])
+        calendar = calendar_for(job)
+        if calendar is None:
+            job.start_time = ready
+            job.end_time = ready + job.actual_duration
+        else:
+            job.start_time = calendar.next_working_time(ready)
+            job.end_time = calendar.add_working_time(job.start_time, job.actual_duration)
+        for resource in job.resource_requirements:
+            resource_free[resource] = job.end_time
+    return jobs
@@ -1,7 +1,11 @@
+import csv
+import json
 import random
+import warnings
 from collections import defaultdict
 from datetime import datetime
 
+import profiling
 from deap_solver_dependency import *
 
 
@@ -80,7 +84,75 @@ def get_data():
     return dummy_data
 
 
+def read_records(path):
+    # Yield records one at a time from a JSON Lines (.jsonl) or CSV export without loading the whole file
+    with open(path, newline='') as file:
+        if path.lower().endswith('.csv'):
+            yield from csv.DictReader(file)
+        else:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def iter_production_jobs(work_orders, operations, dangling_parents=None, unknown_operations=None,
+                         duplicate_keys=None):
+    # Build jobs from iterables of work order and operation records (lists or streaming generators).
+    # Only the key -> (id, parent) index and the per-resource quantity totals are kept, never the records.
+    # Unresolved references are collected into dangling_parents / unknown_operations when given; a work
+    # order repeating an earlier acKey is skipped (the first one wins) and collected into duplicate_keys.
+    index = {}
+    for record in work_orders:
+        name = record["acKey"]
+        if name in index:
+            if duplicate_keys is not None:
+                duplicate_keys.append(name)
+            continue
+        index[name] = (len(index) + 1, record["acKeyParent"])
+
+    quantities = {}
+    for record in operations:
+        name = record["acKey"]
+        if name not in index:
+            if unknown_operations is not None:
+                unknown_operations.append(name)
+            continue
+        job_operations = quantities.setdefault(name, {})
+        resource = record['acResource']
+        job_operations[resource] = job_operations.get(resource, 0.0) + float(record['anQty'])
+
+    for name, (job_id, parent) in index.items():
+        dependencies = []
+        if parent:
+            if parent in index:
+                dependencies = [index[parent][0]]
+            elif dangling_parents is not None:
+                dangling_parents[name] = parent
+        yield UncertainProductionJob(job_id, name, 1, 3, quantities.pop(name, {}), dependencies)
+
+
+def load_production_jobs(work_orders_path, operations_path, dangling_parents=None, unknown_operations=None,
+                         duplicate_keys=None):
+    # Stream test_WOEx and test_WOOperations exports (JSON Lines or CSV) straight into jobs
+    return iter_production_jobs(read_records(work_orders_path), read_records(operations_path),
+                                dangling_parents, unknown_operations, duplicate_keys)
+
+
+def parse_work_orders(json_data):
+    # Parse in-memory work orders; returns the jobs plus the references that could not be resolved
+    dangling_parents = {}
+    unknown_operations = []
+    jobs_list = list(iter_production_jobs(json_data['test_WOEx'], json_data['test_WOOperations'],
+                                          dangling_parents, unknown_operations))
+    return jobs_list, dangling_parents, unknown_operations
+
+
 def parse_json_to_production_schedule():
+    with profiling.span("parse"):
+        return _parse_json_to_production_schedule()
+
+
+def _parse_json_to_production_schedule():
     json_data = get_data()
     # Set company working hours (24/7)
     company_calendar = ProductionCalendar(
@@ -92,51 +164,10 @@ def parse_json_to_production_schedule():
         "resource3": ProductionCalendar([(8, 12), (13, 16)]),
     }
 
-    jobs = []
-    jobs_list = []
     # Parse the data from JSON
-    counter = 1
-    for record in json_data['test_WOEx']:
-        name = record["acKey"]
-        parent = record["acKeyParent"]
-        # Create job based on the record
-        job = {
-            'id': counter,
-            'name': name,
-            'dependency': parent,
-            'operations': [],
-        }
-        counter += 1
-        # Add the job to the list of jobs
-        jobs.append(job)
-
-    for record in json_data['test_WOOperations']:
-        name = record["acKey"]
-        no = record['anNo']
-        qty = record['anQty']
-        resource = record['acResource']
-        operation_name = record['acName']
-        job = next((job for job in jobs if job.get('name') == name), None)
-        if job:
-            if not job.get('operations'):
-                job['operations'] = {}  # Change operations to a dictionary if it's not set yet
-
-            if resource in job['operations']:
-                job['operations'][resource] += float(qty)
-            else:
-                job['operations'][resource] = float(qty)
-
-    counter = 1
-    for job in jobs:
-        index_dependency = 0
-        for job_inner in jobs:
-            if job_inner["name"] == job.get("dependency"):
-                index_dependency = job_inner["id"]
-        jobs_list.append(UncertainProductionJob(counter, job.get("name"), 1,
-                                                3,
-                                                job.get("operations"), [] if job.get("dependency") == "" or
-                                                                             job.get(
-                                                                                 "dependency") is None or index_dependency == 0 else
-                                                [index_dependency]))
-        counter += 1  # increment the id
+    jobs_list, dangling_parents, unknown_operations = parse_work_orders(json_data)
+    for name, parent in dangling_parents.items():
+        warnings.warn(f"Work order {name} references unknown parent {parent}; scheduling it without a parent")
+    if unknown_operations:
+        warnings.warn(f"Operations reference unknown work orders: {', '.join(sorted(set(unknown_operations)))}")
     return company_calendar, resource_calendars, jobs_list
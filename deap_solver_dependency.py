@@ -1,9 +1,23 @@
-import random
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
 import numpy as np
-from deap import base, creator, tools, algorithms
+from deap import base, creator, tools
+
+from calendar_scheduler import forward_schedule
+from decoder import DecodingProblem, apply_schedule, decode
+from fitness import OBJECTIVE_WEIGHTS, evaluate_schedules
+from job_table import JobTable
+import profiling
+from parallel import ParallelEvaluator
+from production_calendar import ProductionCalendar, TimeSlot
+from swarm import Swarm, best_index, optimize, population_size_for, seed_sequence, spawn_generators
 
 
 class ProductionJob:
+    __slots__ = ('id', 'name', 'duration', 'resource_requirements', 'dependencies', 'deadline', 'start_time',
+                 'end_time')
+
     def __init__(self, id, name, duration, resource_requirements, dependencies=None, deadline=None):
         self.id = id
         self.name = name
@@ -15,36 +29,6 @@ class ProductionJob:
         self.end_time = None
 
 
-class TimeSlot:
-    def __init__(self, start, end):
-        self.start = start
-        self.end = end
-
-
-class ProductionCalendar:
-    def __init__(self, work_periods):
-        self.work_periods = [TimeSlot(start, end) for start, end in work_periods]
-
-
-def evaluate(individual, jobs):
-    # Calculate the total duration of the schedule
-    total_duration = sum(individual)
-
-    # Calculate the total idle time in the schedule
-    idle_time = max(0, max(individual) - total_duration)
-
-    # Calculate the total resource utilization
-    total_utilization = sum([job.actual_duration for job, duration in zip(jobs, individual)])
-
-    # Calculate the total deviation from deadlines
-    total_deadline_deviation = sum(
-        [max(0, job.end_time - job.deadline if job.end_time is not None and job.deadline is not None else 0) for job in
-         jobs if job.deadline is not None])
-
-    # Return a tuple of the multiple objectives
-    return total_duration, -idle_time, total_utilization, total_deadline_deviation
-
-
 def dynamic_priority(job, current_time):
     # Example of dynamic priority based on urgency (deadline proximity)
     if job.deadline is not None:
@@ -55,105 +39,132 @@ def dynamic_priority(job, current_time):
         return 0
 
 
-def create_production_schedule(jobs, company_calendar, resource_calendars):
-    # Particle Swarm Optimization parameters
-    POPULATION_SIZE = 10
-    PARTICLE_SIZE = len(jobs)
-    ITERATIONS = 10
-
-    # Create a creator for the individual (schedule)
-    creator.create("FitnessMulti", base.Fitness,
-                   weights=(1.0, -1.0, -1.0, -1.0))  # Minimize duration, idle time, utilization, and deadline deviation
-    creator.create("Particle", list, fitness=creator.FitnessMulti, speed=list, pmin=None, pmax=None, best=None)
-
-    # Create a toolbox for the PSO algorithm
-    toolbox = base.Toolbox()
-    toolbox.register("particle", tools.initRepeat, creator.Particle,
-                     lambda: random.uniform(0, max([job.max_duration for job in jobs])), n=PARTICLE_SIZE)
-    toolbox.register("population", tools.initRepeat, list, toolbox.particle)
-    toolbox.register("mate", tools.cxBlend, alpha=0.5)
-    toolbox.register("mutate", tools.mutGaussian, mu=0, sigma=1, indpb=0.2)
-    toolbox.register("select", tools.selBest)
-    toolbox.register("evaluate", evaluate, jobs=jobs)
-
-    # Initialize the particle population
-    population = toolbox.population(n=POPULATION_SIZE)
-
-    # Initialize particle attributes (speed, pmin, pmax, best)
-    for particle in population:
-        particle.speed = [random.uniform(-1, 1) for _ in range(PARTICLE_SIZE)]
-        particle.pmin = [0] * PARTICLE_SIZE
-        particle.pmax = [max([job.max_duration for job in jobs])] * PARTICLE_SIZE
-        particle.best = particle
-
-    # PSO algorithm
-    for iteration in range(ITERATIONS):
-        for particle in population:
-            # Update particle speed and position
-            for i in range(PARTICLE_SIZE):
-                inertia = 0.5
-                cognitive_weight = 1.5
-                social_weight = 1.5
-                r1, r2 = random.uniform(0, 1), random.uniform(0, 1)
-
-                # Update speed
-                particle.speed[i] = inertia * particle.speed[i] + \
-                                    cognitive_weight * r1 * (particle.best[i] - particle[i]) + \
-                                    social_weight * r2 * (particle.best[i] - particle[i])
-
-                # Update position
-                particle[i] += particle.speed[i]
-
-                # Clip position to the feasible range
-                particle[i] = max(particle.pmin[i], min(particle[i], particle.pmax[i]))
-
-            # Evaluate fitness
-            fitness = toolbox.evaluate(particle)
-
-            # Update personal best if the current position is better
-            if fitness > particle.best.fitness.values:
-                particle.best = creator.Particle(particle)
-                particle.best.fitness.values = fitness
-
-    # Select the best individual from the final population
-    best_particle = tools.selBest(population, k=1)[0]
-
-    # Update job start and end times based on the best individual
-    # Update job start and end times based on the best individual
-    # Find jobs without dependencies
-    independent_jobs = [job for job in jobs if not job.dependencies]
-
-    # Find jobs with dependencies
-    jobs_with_dependencies = [job for job in jobs if job.dependencies]
-
-    # Sort jobs with dependencies based on priority
-    jobs_with_dependencies.sort(key=lambda job: dynamic_priority(job, 0), reverse=True)
-
-    # Initialize start times for jobs without dependencies
-    current_time = 0
-    for job in independent_jobs:
-        job.start_time = current_time
-        job.actual_duration = (job.min_duration + job.max_duration) / 2
-        job.end_time = job.start_time + job.actual_duration
-
-    # Map job IDs to their respective instances for easy access
-    job_map = {job.id: job for job in jobs}
-
-    # Schedule jobs with dependencies considering their start times
-    for job in jobs_with_dependencies:
-        dependencies = job.dependencies
-        max_end_time = max(
-            job_map[dependency].end_time for dependency in dependencies if job_map[dependency].end_time is not None)
-        job.start_time = max(max_end_time if max_end_time is not None else 0,
-                             job.start_time if job.start_time is not None else 0)
-        job.actual_duration = (job.min_duration + job.max_duration) / 2
-        job.end_time = job.start_time + job.actual_duration
-
-
-
-    return jobs
+class ScheduleSolver:
+    # Reusable PSO solver: the DEAP types and toolbox operators are registered once, and the swarm buffers
+    # of each particle size are kept between solves, so repeated small replans only pay for the search.
+    # A worker pool started for workers= is kept as well; close() shuts it down. seed makes runs reproducible:
+    # every solve spawns one independent random stream per restart from it.
+    # A search runs until iterations, patience iterations without a better global best, time_budget seconds
+    # or a target fitness is reached, whichever comes first; population_size=None scales with the job count.
+    def __init__(self, population_size=None, iterations=200, workers=None, executor=None, restarts=1,
+                 use_calendars=False, seed=None, patience=10, time_budget=None, target=None):
+        self.seed_sequence = seed_sequence(seed)
+        self.population_size = population_size
+        self.iterations = iterations
+        self.patience = patience
+        self.time_budget = time_budget
+        self.target = target
+        self.workers = workers
+        self.restarts = restarts
+        self.use_calendars = use_calendars
+        self.owns_executor = executor is None and workers is not None and workers > 1
+        self.executor = ProcessPoolExecutor(max_workers=workers) if self.owns_executor else executor
+
+        # Create a creator for the individual (schedule), unless an earlier solver already did. The names are
+        # this module's own: deap_test re-creates FitnessMulti and Particle with other weights.
+        if not hasattr(creator, "ScheduleFitness"):
+            creator.create("ScheduleFitness", base.Fitness, weights=OBJECTIVE_WEIGHTS)
+        if not hasattr(creator, "ScheduleParticle"):
+            creator.create("ScheduleParticle", list, fitness=creator.ScheduleFitness, speed=list, pmin=None,
+                           pmax=None, best=None)
+
+        # Create a toolbox for the PSO algorithm
+        self.toolbox = base.Toolbox()
+        self.toolbox.register("mate", tools.cxBlend, alpha=0.5)
+        self.toolbox.register("mutate", tools.mutGaussian, mu=0, sigma=1, indpb=0.2)
+        self.toolbox.register("select", tools.selBest)
+        self._swarms = {}
+
+    def _population_size(self, dimensions):
+        return self.population_size if self.population_size is not None else population_size_for(dimensions)
+
+    def _swarm(self, dimensions, pmax, rng):
+        # Swarm with preallocated buffers for this particle size, re-scattered for the new solve
+        swarm = self._swarms.get(dimensions)
+        if swarm is None:
+            swarm = self._swarms[dimensions] = Swarm(self._population_size(dimensions), dimensions, pmin=0,
+                                                     pmax=pmax, weights=OBJECTIVE_WEIGHTS, rng=rng)
+        else:
+            swarm.rng = rng
+            swarm.reset(0, pmax)
+        return swarm
+
+    def solve(self, jobs, company_calendar, resource_calendars, rows=None, groups=None):
+        # rows picks and orders the JobTable rows that become particle dimensions (all rows, in table order,
+        # by default); groups gives the group of each dimension, e.g. job levels, which the decoder schedules
+        # lowest first among ready jobs. A job list is used in its own order.
+        with profiling.span("pso_solve", jobs=len(jobs)):
+            return self._solve(jobs, company_calendar, resource_calendars, rows, groups)
+
+    def _solve(self, jobs, company_calendar, resource_calendars, rows=None, groups=None):
+        toolbox = self.toolbox
+        if isinstance(jobs, JobTable):
+            max_duration = float(jobs.max_durations.max())
+        else:
+            max_duration = max(job.max_duration for job in jobs)
+        # Each particle is a priority vector that is decoded into a schedule before it is evaluated
+        if isinstance(jobs, JobTable):
+            problem = DecodingProblem.from_table(jobs, rows, groups=groups)
+        else:
+            problem = DecodingProblem.from_jobs(jobs, groups=groups)
+        dimensions = problem.size
+        toolbox.register("evaluate", evaluate_schedules, problem=problem)
+        generators = spawn_generators(self.seed_sequence, self.restarts)
+        stopping = (self.iterations, self.patience, self.time_budget, self.target)
+
+        # Evaluate in-process, or fan particle evaluation and restarts out over worker processes
+        # A process pool outlives this solve, so the problem is installed in its workers once per solve
+        with ParallelEvaluator(evaluate_schedules, problem, self.workers, self.executor) as evaluator:
+            if self.restarts > 1:
+                # Independent restarts each run a whole swarm, with its own random stream, in a worker
+                toolbox.register("swarm", Swarm, self._population_size(dimensions), dimensions, pmin=0,
+                                 pmax=max_duration, weights=OBJECTIVE_WEIGHTS)
+                results = evaluator.map(optimize, [(partial(toolbox.swarm, rng=rng), toolbox.evaluate) + stopping
+                                                   for rng in generators])
+            else:
+                toolbox.register("swarm", self._swarm, dimensions, max_duration, generators[0])
+                toolbox.register("evaluate", evaluator)
+                results = [optimize(toolbox.swarm, toolbox.evaluate, *stopping)]
+
+        # Select the best individual found by the swarm(s)
+        fitnesses = np.array([fitness for position, fitness in results])
+        position, fitness = results[best_index(fitnesses * OBJECTIVE_WEIGHTS)]
+        best_particle = creator.ScheduleParticle(position)
+        best_particle.fitness.values = tuple(fitness)
+
+        # Update job start and end times based on the best individual
+        starts, ends = decode(best_particle, problem)
+        apply_schedule(jobs, starts, ends, problem)
+
+        # Map the sequence onto working time of the company and resource calendars
+        if self.use_calendars:
+            forward_schedule(jobs, company_calendar, resource_calendars,
+                             priority=lambda job: job.start_time if job.start_time is not None else 0)
+
+        return jobs
+
+    def close(self):
+        if self.owns_executor:
+            self.executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def create_production_schedule(jobs, company_calendar, resource_calendars, workers=None, executor=None,
+                               restarts=1, use_calendars=False, seed=None, **options):
+    # One-off solve; keep a ScheduleSolver around instead when scheduling repeatedly. options are the
+    # ScheduleSolver search settings (population_size, iterations, patience, time_budget, target).
+    with ScheduleSolver(workers=workers, executor=executor, restarts=restarts, use_calendars=use_calendars,
+                        seed=seed, **options) as solver:
+        return solver.solve(jobs, company_calendar, resource_calendars)
 
 class UncertainProductionJob(ProductionJob):
+    __slots__ = ('min_duration', 'max_duration', 'actual_duration', 'time_window', 'alternative_resources')
+
     def __init__(self, id, name, min_duration, max_duration, resource_requirements, dependencies=None,
                  deadline=None, time_window=None, alternative_resources=None):
         super().__init__(id, name, 0, resource_requirements, dependencies, deadline)
@@ -1,20 +1,12 @@
-import random
 import numpy as np
 from deap import base, creator, tools, algorithms
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.model_selection import train_test_split
 import networkx as nx
 
-
-class TimeSlot:
-    def __init__(self, start, end):
-        self.start = start
-        self.end = end
-
-
-class ProductionCalendar:
-    def __init__(self, work_periods):
-        self.work_periods = [TimeSlot(start, end) for start, end in work_periods]
+from precedence import PrecedenceGraph
+from production_calendar import ProductionCalendar, ResourceAvailabilityIndex, TimeSlot
+from swarm import spawn_generators
 
 
 def evaluate(individual, jobs):
@@ -61,13 +53,15 @@ def predict_job_durations(jobs, historical_data):
             job.max_duration = job.min_duration * 1.5  # Adjust for uncertainty
 
 
-def simulate_resource_availability(resource_calendars, uncertainty_factor=0.2):
+def simulate_resource_availability(resource_calendars, uncertainty_factor=0.2, rng=None):
     # Simulate uncertainties in resource availability
+    rng = rng if rng is not None else np.random.default_rng()
     for resource, calendar in resource_calendars.items():
         for time_slot in calendar.work_periods:
-            if random.uniform(0, 1) < uncertainty_factor:
+            if rng.uniform(0, 1) < uncertainty_factor:
                 # Reduce resource availability during this time slot
-                time_slot.end -= random.uniform(0, (time_slot.end - time_slot.start) * 0.5)  # Reduce by up to 50%
+                time_slot.end -= rng.uniform(0, (time_slot.end - time_slot.start) * 0.5)  # Reduce by up to 50%
+        calendar.invalidate()
 
 
 def create_dag(jobs):
@@ -93,25 +87,22 @@ def check_time_window(job, current_time):
 
 def check_resource_availability(job, resource_calendars, current_time):
     # Check if the required resources are available at the current time
-    for resource, calendar in job.resource_requirements.items():
-        resource_calendar = resource_calendars[resource]
-        for time_slot in resource_calendar.work_periods:
-            if time_slot.start <= current_time <= time_slot.end:
-                return True
-    return False
+    return any(resource_calendars[resource].is_available(current_time) for resource in job.resource_requirements)
 
 
-def find_alternative_resources(job, resource_calendars, current_time):
+def find_alternative_resources(job, resource_calendars, current_time, availability=None):
     # Find alternative resources available at the current time
-    alternative_resources = []
-    for resource, calendar in resource_calendars.items():
-        for time_slot in calendar.work_periods:
-            if time_slot.start <= current_time <= time_slot.end and resource not in job.resource_requirements:
-                alternative_resources.append(resource)
-    return alternative_resources
+    if availability is None:
+        availability = ResourceAvailabilityIndex(resource_calendars)
+    return [resource for resource in availability.available_at(current_time)
+            if resource not in job.resource_requirements]
+
 
+def create_production_schedule(jobs, company_calendar, resource_calendars, historical_data, uncertainty_factor=0.2,
+                               seed=None):
+    # Separate random streams for the particles and for the simulated availability, reproducible with seed
+    particle_rng, availability_rng = spawn_generators(seed, 2)
 
-def create_production_schedule(jobs, company_calendar, resource_calendars, historical_data, uncertainty_factor=0.2):
     # Particle Swarm Optimization parameters
     POPULATION_SIZE = 10
     PARTICLE_SIZE = len(jobs)
@@ -124,8 +115,8 @@ def create_production_schedule(jobs, company_calendar, resource_calendars, histo
 
     def create_particle():
         particle = creator.Particle()
-        particle.extend([random.uniform(0, max([job.max_duration for job in jobs])) for _ in range(PARTICLE_SIZE)])
-        particle.speed = [random.uniform(0, 1) for _ in range(PARTICLE_SIZE)]
+        particle.extend(particle_rng.uniform(0, max([job.max_duration for job in jobs]), PARTICLE_SIZE).tolist())
+        particle.speed = particle_rng.uniform(0, 1, PARTICLE_SIZE).tolist()
         particle.pmin = [0] * PARTICLE_SIZE
         particle.pmax = [max([job.max_duration for job in jobs])] * PARTICLE_SIZE
         particle.best = creator.Particle(particle)
@@ -143,26 +134,27 @@ def create_production_schedule(jobs, company_calendar, resource_calendars, histo
     # Initialize the particle population
     population = toolbox.population()
 
+    # Dependencies do not change during a run, so the DAG and its topological order are built once
+    graph = PrecedenceGraph(jobs)
+
     # predict_job_durations(jobs, historical_data)
     # PSO algorithm
     for iteration in range(ITERATIONS):
         # Simulate uncertainties in resource availability for each iteration
-        simulate_resource_availability(resource_calendars, uncertainty_factor)
-
-        # Create a directed acyclic graph (DAG) for job dependencies
-        dag = create_dag(jobs)
+        simulate_resource_availability(resource_calendars, uncertainty_factor, availability_rng)
+        availability = ResourceAvailabilityIndex(resource_calendars)
 
-        # Perform topological sorting to determine the order of job scheduling
-        sorted_job_ids = topological_sort(dag)
+        # Topological order of the cached dependency DAG determines the order of job scheduling
+        sorted_job_ids = graph.order
 
         current_time = min(job.time_window[0] for job in jobs if job.time_window) if any(
             job.time_window for job in jobs) else 0
 
         for job_id in sorted_job_ids:
-            job = dag.nodes[job_id]['job']
+            job = graph.job(job_id)
 
             # Find the particle index corresponding to the job
-            particle_index = jobs.index(job)
+            particle_index = graph.index(job_id)
 
 
 
@@ -174,7 +166,7 @@ def create_production_schedule(jobs, company_calendar, resource_calendars, histo
                     inertia = 0.5
                     cognitive_weight = 1.5
                     social_weight = 1.5
-                    r1, r2 = random.uniform(0, 1), random.uniform(0, 1)
+                    r1, r2 = particle_rng.uniform(0, 1, 2)
 
                     # Update speed
                     population[particle_index].speed[i] = inertia * population[particle_index].speed[i] + \
@@ -209,10 +201,10 @@ def create_production_schedule(jobs, company_calendar, resource_calendars, histo
 
             # If the job cannot be scheduled at the current time, try alternative resources
             else:
-                alternative_resources = find_alternative_resources(job, resource_calendars, current_time)
+                alternative_resources = find_alternative_resources(job, resource_calendars, current_time, availability)
                 if alternative_resources:
                     # Randomly select an alternative resource
-                    selected_resource = random.choice(alternative_resources)
+                    selected_resource = alternative_resources[particle_rng.integers(len(alternative_resources))]
                     job.resource_requirements[selected_resource] = job.resource_requirements.popitem()[0]
 
     return jobs
@@ -0,0 +1,232 @@
+import heapq
+
+import numpy as np
+
+from job_table import JobTable
+
+
+class DecodingProblem:
+    # Integer-coded instance shared by every decode of a solve: expected durations, deadlines (NaN when
+    # none), resource codes per job, successor lists and predecessor counts. Rows follow the job list.
+    # groups orders the decoder before priorities do (lower group first), e.g. job levels.
+    def __init__(self, durations, deadlines, job_resources, successors, groups=None):
+        self.durations = np.asarray(durations, dtype=float)
+        self.deadlines = np.asarray(deadlines, dtype=float)
+        self.job_resources = [tuple(resources) for resources in job_resources]
+        # A dependency listed twice is still one edge; the kernel's fancy-indexed updates count it only once
+        self.successors = [list(dict.fromkeys(succs)) for succs in successors]
+        self.groups = np.zeros(len(self.durations), dtype=np.int64) if groups is None else np.asarray(groups)
+        self.size = len(self.durations)
+        self.resource_count = 1 + max((code for resources in self.job_resources for code in resources), default=-1)
+
+        self.predecessor_counts = [0] * self.size
+        for succs in self.successors:
+            for succ in succs:
+                self.predecessor_counts[succ] += 1
+
+        # (job, resource) pairs sorted by resource, with the offset of each resource's first pair
+        pairs = sorted((code, job) for job, resources in enumerate(self.job_resources) for code in resources)
+        self.pair_resources = np.array([code for code, job in pairs], dtype=np.int64)
+        self.pair_jobs = np.array([job for code, job in pairs], dtype=np.int64)
+        self.resource_offsets = np.flatnonzero(np.diff(self.pair_resources, prepend=-1))
+        self.busy_time = float(self.durations[self.pair_jobs].sum()) if pairs else 0.0
+        self.has_deadline = ~np.isnan(self.deadlines)
+
+        # Plain lists for the scalar reference decoder
+        self._durations = self.durations.tolist()
+        self._groups = self.groups.tolist()
+
+        # Padded integer matrices for the population kernel. Missing entries point at a spare column
+        # (resource code resource_count, job index size) that the kernel resets or never reads.
+        self.resource_matrix = _padded(self.job_resources, self.resource_count)
+        self.successor_matrix = _padded(self.successors, self.size)
+        # JobTable rows behind the problem's jobs, when it was built from a table
+        self.table_rows = None
+
+    @classmethod
+    def from_jobs(cls, jobs, groups=None):
+        # Expected duration is the midpoint of the job's duration range, as everywhere else in the solvers
+        if isinstance(jobs, JobTable):
+            return cls.from_table(jobs, groups=groups)
+        rows = {job.id: row for row, job in enumerate(jobs)}
+        resource_codes = {}
+        successors = [[] for _ in jobs]
+        for row, job in enumerate(jobs):
+            for dependency in job.dependencies:
+                if dependency in rows:
+                    successors[rows[dependency]].append(row)
+        job_resources = [[resource_codes.setdefault(resource, len(resource_codes))
+                          for resource in job.resource_requirements] for job in jobs]
+        return cls(
+            durations=[(job.min_duration + job.max_duration) / 2 for job in jobs],
+            deadlines=[np.nan if job.deadline is None else job.deadline for job in jobs],
+            job_resources=job_resources,
+            successors=successors,
+            groups=groups,
+        )
+
+    @classmethod
+    def from_table(cls, table, rows=None, groups=None):
+        # from_jobs straight from the columns of a JobTable; rows picks and orders the table rows that become
+        # the problem's jobs (all of them, in table order, by default)
+        rows = np.arange(len(table)) if rows is None else np.asarray(rows, dtype=np.int64)
+        position = np.full(len(table), -1, dtype=np.int64)
+        position[rows] = np.arange(len(rows))
+        # Dependency edges between selected rows, as (dependency, dependent) problem positions
+        dependents = np.repeat(np.arange(len(table)), np.diff(table.dependency_indptr))
+        before, after = position[table.dependency_indices], position[dependents]
+        known = (before >= 0) & (after >= 0)
+        successors = [[] for _ in range(len(rows))]
+        for dependency, dependent in zip(before[known].tolist(), after[known].tolist()):
+            successors[dependency].append(dependent)
+        bounds = zip(table.requirement_indptr[rows].tolist(), table.requirement_indptr[rows + 1].tolist())
+        problem = cls(
+            durations=(table.min_durations[rows] + table.max_durations[rows]) / 2,
+            deadlines=table.deadlines[rows],
+            job_resources=[table.requirement_resources[start:end].tolist() for start, end in bounds],
+            successors=successors,
+            groups=groups,
+        )
+        problem.table_rows = rows
+        return problem
+
+
+def _padded(rows, fill):
+    # Integer-coded rows of different lengths as one matrix, padded with fill
+    matrix = np.full((len(rows), max((len(row) for row in rows), default=0)), fill, dtype=np.int64)
+    for i, row in enumerate(rows):
+        matrix[i, :len(row)] = row
+    return matrix
+
+
+def decode(priorities, problem):
+    # Serial schedule generation: repeatedly take the ready job (all predecessors placed) with the lowest
+    # group and then the highest priority (lowest row on ties), and append it to its resources' timelines
+    # at the earliest time its predecessors are finished and its resources are free. O(n log n) per decode.
+    priorities = priorities.tolist() if isinstance(priorities, np.ndarray) else list(priorities)
+    durations, groups = problem._durations, problem._groups
+    waiting = list(problem.predecessor_counts)
+    ready_at = [0.0] * problem.size
+    resource_free = [0.0] * problem.resource_count
+    starts = [0.0] * problem.size
+    ends = [0.0] * problem.size
+    heap = [(groups[job], -priorities[job], job) for job in range(problem.size) if waiting[job] == 0]
+    heapq.heapify(heap)
+    while heap:
+        job = heapq.heappop(heap)[2]
+        start = ready_at[job]
+        for code in problem.job_resources[job]:
+            if resource_free[code] > start:
+                start = resource_free[code]
+        end = start + durations[job]
+        starts[job] = start
+        ends[job] = end
+        for code in problem.job_resources[job]:
+            resource_free[code] = end
+        for succ in problem.successors[job]:
+            if end > ready_at[succ]:
+                ready_at[succ] = end
+            waiting[succ] -= 1
+            if waiting[succ] == 0:
+                heapq.heappush(heap, (groups[succ], -priorities[succ], succ))
+    if any(waiting):
+        raise ValueError("Job dependencies contain a cycle")
+    return np.array(starts), np.array(ends)
+
+
+def decode_population(positions, problem):
+    # Array kernel equivalent to running decode on every row of positions: each of the n steps places one
+    # job in every schedule at once. Jobs are ranked once per schedule by decode's (group, -priority, row)
+    # key, so a step is a single argmin over the ranks of ready jobs. Only NumPy ufuncs and fancy indexing
+    # over integer-coded arrays, so the loop can be JIT-compiled later without changes to the data layout.
+    positions = np.atleast_2d(np.asarray(positions, dtype=float))
+    count, size = positions.shape[0], problem.size
+    rows = np.arange(count)
+    columns = rows[:, None]
+
+    # rank[p, j] is the position of job j in schedule p's total order; column size is the sentinel
+    order = np.lexsort((-positions, np.broadcast_to(problem.groups, positions.shape)))
+    rank = np.full((count, size + 1), size, dtype=np.int64)
+    rank[columns, order] = np.arange(size)
+
+    waiting = np.zeros((count, size + 1), dtype=np.int64)
+    waiting[:, :size] = problem.predecessor_counts
+    key = np.where(waiting == 0, rank, size)
+    ready_at = np.zeros((count, size + 1))
+    resource_free = np.zeros((count, problem.resource_count + 1))
+    starts = np.empty((count, size))
+    ends = np.empty((count, size))
+    for _ in range(size):
+        job = key.argmin(axis=1)
+        if (key[rows, job] == size).any():
+            raise ValueError("Job dependencies contain a cycle")
+        key[rows, job] = size
+
+        codes = problem.resource_matrix[job]
+        start = np.maximum(ready_at[rows, job], resource_free[columns, codes].max(axis=1, initial=0.0))
+        end = start + problem.durations[job]
+        starts[rows, job] = start
+        ends[rows, job] = end
+        resource_free[columns, codes] = end[:, None]
+        resource_free[:, -1] = 0
+
+        successors = problem.successor_matrix[job]
+        ready_at[columns, successors] = np.maximum(ready_at[columns, successors], end[:, None])
+        waiting[columns, successors] -= 1
+        released = waiting[columns, successors] == 0
+        key[columns, successors] = np.where(released, rank[columns, successors], key[columns, successors])
+    return starts, ends
+
+
+def schedule_objectives(starts, ends, problem):
+    # Objectives of decoded schedules (one row per schedule): makespan, idle time between the first and
+    # last job of every resource, total completion time and total deviation past deadlines
+    starts = np.atleast_2d(starts)
+    ends = np.atleast_2d(ends)
+    objectives = np.zeros((starts.shape[0], 4))
+    if problem.size == 0:
+        return objectives
+    objectives[:, 0] = ends.max(axis=1)
+    if len(problem.pair_jobs):
+        first_starts = np.minimum.reduceat(starts[:, problem.pair_jobs], problem.resource_offsets, axis=1)
+        last_ends = np.maximum.reduceat(ends[:, problem.pair_jobs], problem.resource_offsets, axis=1)
+        objectives[:, 1] = (last_ends - first_starts).sum(axis=1) - problem.busy_time
+    objectives[:, 2] = ends.sum(axis=1)
+    lateness = ends[:, problem.has_deadline] - problem.deadlines[problem.has_deadline]
+    objectives[:, 3] = np.maximum(0, lateness).sum(axis=1)
+    return objectives
+
+
+def apply_schedule(jobs, starts, ends, problem):
+    # Write a decoded schedule back onto the job objects, or into the output columns of a JobTable
+    if isinstance(jobs, JobTable):
+        rows = problem.table_rows if problem.table_rows is not None else np.arange(len(jobs))
+        jobs.actual_durations[rows] = problem.durations
+        jobs.start_times[rows] = starts
+        jobs.end_times[rows] = ends
+        return jobs
+    for job, duration, start, end in zip(jobs, problem._durations, starts.tolist(), ends.tolist()):
+        job.actual_duration = duration
+        job.start_time = start
+        job.end_time = end
+    return jobs
+
+
+if __name__ == "__main__":
+    import time
+
+    # Throughput on a 50-job, 5-resource instance; test_decoder.py checks that both decoders agree
+    rng = np.random.default_rng(0)
+    size = 50
+    problem = DecodingProblem(
+        durations=rng.integers(1, 10, size),
+        deadlines=np.full(size, np.nan),
+        job_resources=[[job % 5] for job in range(size)],
+        successors=[np.flatnonzero(rng.random(size - job - 1) < 0.05) + job + 1 for job in range(size)],
+    )
+    positions = rng.uniform(-1, 1, (2000, size))
+    for name, run in [("decode", lambda: [decode(priorities, problem) for priorities in positions]),
+                      ("decode_population", lambda: decode_population(positions, problem))]:
+        begin = time.perf_counter()
+        run()
+        print(f"{name}: {len(positions) * 60 / (time.perf_counter() - begin):,.0f} decodes per minute")
@@ -0,0 +1,120 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from calendar_scheduler import forward_schedule
+from deap_solver_dependency import ScheduleSolver
+from rolling_horizon import BACKENDS, pulp_start_times
+from swarm import seed_sequence
+
+
+class DisjointSet:
+    # Union-find with path halving and union by size
+    def __init__(self):
+        self.parent = {}
+        self.size = {}
+
+    def find(self, item):
+        self.parent.setdefault(item, item)
+        self.size.setdefault(item, 1)
+        while self.parent[item] != item:
+            self.parent[item] = self.parent[self.parent[item]]
+            item = self.parent[item]
+        return item
+
+    def union(self, item, other):
+        root, other_root = self.find(item), self.find(other)
+        if root == other_root:
+            return root
+        if self.size[root] < self.size[other_root]:
+            root, other_root = other_root, root
+        self.parent[other_root] = root
+        self.size[root] += self.size[other_root]
+        return root
+
+
+def independent_components(jobs):
+    # Split jobs into groups that share no resource and no dependency edge (the connected components of
+    # the job/resource graph plus the dependency DAG). Each group keeps the input order of its jobs;
+    # groups are returned largest first.
+    known = {job.id for job in jobs}
+    components = DisjointSet()
+    resource_owner = {}
+    for job in jobs:
+        components.find(job.id)
+        for dependency in job.dependencies:
+            if dependency in known:
+                components.union(job.id, dependency)
+        for resource in job.resource_requirements:
+            components.union(job.id, resource_owner.setdefault(resource, job.id))
+
+    groups = {}
+    for job in jobs:
+        groups.setdefault(components.find(job.id), []).append(job)
+    return sorted(groups.values(), key=len, reverse=True)
+
+
+def pack_components(components, min_size):
+    # Merge small components (largest first) into tasks of at least min_size jobs, so a pool is not
+    # flooded with single-job subproblems. Merged components stay independent inside the task.
+    tasks = []
+    pending = []
+    for component in components:
+        if len(component) >= min_size:
+            tasks.append(component)
+            continue
+        pending.extend(component)
+        if len(pending) >= min_size:
+            tasks.append(pending)
+            pending = []
+    if pending:
+        tasks.append(pending)
+    return tasks
+
+
+def solve_subproblem(jobs, company_calendar, resource_calendars, backend, options):
+    # Schedule one independent group of jobs; returns {job id: (start, end, actual duration)}
+    if backend == 'pso':
+        with ScheduleSolver(**options) as solver:
+            solver.solve(jobs, company_calendar, resource_calendars)
+    else:
+        # The MILP only fixes the order: every subproblem is placed by the calendar-aware forward pass in
+        # order of MILP start (topological order when there is no MILP schedule), like rolling_horizon commits
+        # its windows, so all groups of the merged plan are on the same clock
+        starts = pulp_start_times(jobs, **dict({'resource_mode': 'disjunctive'}, **options))
+        forward_schedule(jobs, company_calendar, resource_calendars,
+                         priority=lambda job: starts.get(job.id, 0))
+    return {job.id: (job.start_time, job.end_time, job.actual_duration) for job in jobs}
+
+
+def decomposed_schedule(jobs, company_calendar=None, resource_calendars=None, backend='pso', workers=None,
+                        executor=None, min_size=50, **options):
+    # Solve every independent group of jobs as its own subproblem ('pso' or 'pulp', options go to
+    # ScheduleSolver or pulp_solve), in a process pool when workers > 1 or an executor is given, and write
+    # the merged schedule back onto jobs. Groups share nothing, so merging needs no repair.
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend!r}, expected one of {BACKENDS}")
+    tasks = pack_components(independent_components(jobs), min_size)
+    if backend == 'pso':
+        # One independent random stream per task, so seeded runs match whatever the pool does
+        task_options = [dict(options, seed=child) for child in seed_sequence(options.get('seed')).spawn(len(tasks))]
+    else:
+        task_options = [options] * len(tasks)
+    arguments = ([company_calendar] * len(tasks), [resource_calendars] * len(tasks), [backend] * len(tasks),
+                 task_options)
+
+    owns_executor = executor is None and workers is not None and workers > 1 and len(tasks) > 1
+    if owns_executor:
+        executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        if executor is None:
+            results = map(solve_subproblem, tasks, *arguments)
+        else:
+            results = executor.map(solve_subproblem, tasks, *arguments)
+        jobs_by_id = {job.id: job for job in jobs}
+        for times in results:
+            for job_id, (start_time, end_time, actual_duration) in times.items():
+                job = jobs_by_id[job_id]
+                job.start_time, job.end_time, job.actual_duration = start_time, end_time, actual_duration
+    finally:
+        if owns_executor:
+            executor.shutdown()
+    return jobs
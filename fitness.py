@@ -0,0 +1,13 @@
+import profiling
+from decoder import decode_population, schedule_objectives
+
+# Weights of the schedule objectives: makespan, idle time, completion time and tardiness are all minimized
+OBJECTIVE_WEIGHTS = (-1.0, -1.0, -1.0, -1.0)
+
+
+def evaluate_schedules(positions, problem):
+    # Decode every particle (a priority vector) into a schedule and score the schedules themselves
+    with profiling.span("decode"):
+        starts, ends = decode_population(positions, problem)
+    profiling.count("evaluations", len(starts))
+    return schedule_objectives(starts, ends, problem)
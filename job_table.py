@@ -0,0 +1,200 @@
+import numpy as np
+
+
+def _csr(rows):
+    # Pack a list of integer lists into CSR form (row pointer + flat values)
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum([len(row) for row in rows])
+    values = np.fromiter((value for row in rows for value in row), dtype=np.int64, count=int(indptr[-1]))
+    return indptr, values
+
+
+class JobTable:
+    # Columnar job store: one typed array per job attribute, dependencies and resource requirements in
+    # CSR form. Rows are addressed by position; JobView gives the object API used by the solvers.
+    def __init__(self, ids, names, durations, min_durations, max_durations, deadlines, levels, resources,
+                 requirement_indptr, requirement_resources, requirement_quantities, dependency_indptr,
+                 dependency_indices, time_windows=None, alternative_resources=None):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.names = list(names)
+        self.durations = np.asarray(durations, dtype=float)
+        self.min_durations = np.asarray(min_durations, dtype=float)
+        self.max_durations = np.asarray(max_durations, dtype=float)
+        self.deadlines = np.asarray(deadlines, dtype=float)
+        self.levels = np.asarray(levels, dtype=np.int32)
+        self.resources = list(resources)
+        self.requirement_indptr = np.asarray(requirement_indptr, dtype=np.int64)
+        self.requirement_resources = np.asarray(requirement_resources, dtype=np.int32)
+        self.requirement_quantities = np.asarray(requirement_quantities, dtype=float)
+        self.dependency_indptr = np.asarray(dependency_indptr, dtype=np.int64)
+        self.dependency_indices = np.asarray(dependency_indices, dtype=np.int64)
+        # Sparse extras: most jobs have neither, so they are kept in dictionaries keyed by row
+        self.time_windows = time_windows if time_windows is not None else {}
+        self.alternative_resources = alternative_resources if alternative_resources is not None else {}
+
+        # Primary resource code per job (first requirement, -1 when there is none)
+        has_requirement = self.requirement_indptr[1:] > self.requirement_indptr[:-1]
+        self.resource_codes = np.full(len(self.ids), -1, dtype=np.int32)
+        self.resource_codes[has_requirement] = self.requirement_resources[self.requirement_indptr[:-1][has_requirement]]
+
+        # Schedule output columns
+        self.actual_durations = np.zeros(len(self.ids))
+        self.start_times = np.full(len(self.ids), np.nan)
+        self.end_times = np.full(len(self.ids), np.nan)
+        self.positions = None
+
+    @classmethod
+    def from_jobs(cls, jobs):
+        # Build a table from ProductionJob / UncertainProductionJob objects
+        positions = {job.id: row for row, job in enumerate(jobs)}
+        resource_codes = {}
+        requirement_rows = []
+        quantities = []
+        dependency_rows = []
+        time_windows = {}
+        alternative_resources = {}
+        for row, job in enumerate(jobs):
+            requirement_rows.append([resource_codes.setdefault(resource, len(resource_codes))
+                                     for resource in job.resource_requirements])
+            quantities.extend(job.resource_requirements.values())
+            try:
+                dependency_rows.append([positions[dependency] for dependency in job.dependencies])
+            except KeyError as error:
+                raise ValueError(f"Job {job.id} depends on unknown job {error.args[0]}") from None
+            if getattr(job, 'time_window', None) is not None:
+                time_windows[row] = job.time_window
+            if getattr(job, 'alternative_resources', None):
+                alternative_resources[row] = list(job.alternative_resources)
+        requirement_indptr, requirement_resources = _csr(requirement_rows)
+        dependency_indptr, dependency_indices = _csr(dependency_rows)
+        return cls(
+            ids=[job.id for job in jobs],
+            names=[job.name for job in jobs],
+            durations=[job.duration for job in jobs],
+            min_durations=[getattr(job, 'min_duration', job.duration) for job in jobs],
+            max_durations=[getattr(job, 'max_duration', job.duration) for job in jobs],
+            deadlines=[np.nan if job.deadline is None else job.deadline for job in jobs],
+            levels=[getattr(job, 'level', 0) for job in jobs],
+            resources=list(resource_codes),
+            requirement_indptr=requirement_indptr,
+            requirement_resources=requirement_resources,
+            requirement_quantities=quantities,
+            dependency_indptr=dependency_indptr,
+            dependency_indices=dependency_indices,
+            time_windows=time_windows,
+            alternative_resources=alternative_resources,
+        )
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, row):
+        return JobView(self, row)
+
+    def __iter__(self):
+        return (JobView(self, row) for row in range(len(self.ids)))
+
+    def views(self):
+        # A list of views, for solvers that sort or filter their job list in place
+        return list(self)
+
+    def row_of(self, job_id):
+        # The id -> row index is only built when something asks for it
+        if self.positions is None:
+            self.positions = {job_id: row for row, job_id in enumerate(self.ids.tolist())}
+        return self.positions[job_id]
+
+    def dependency_rows(self, row):
+        return self.dependency_indices[self.dependency_indptr[row]:self.dependency_indptr[row + 1]]
+
+    def requirements(self, row):
+        start, end = self.requirement_indptr[row], self.requirement_indptr[row + 1]
+        return {self.resources[code]: quantity for code, quantity
+                in zip(self.requirement_resources[start:end].tolist(), self.requirement_quantities[start:end].tolist())}
+
+
+def _nan_to_none(value):
+    return None if value != value else value
+
+
+class JobView:
+    # Slot-based stand-in for UncertainProductionJob that reads and writes one row of a JobTable
+    __slots__ = ('table', 'row')
+
+    def __init__(self, table, row):
+        self.table = table
+        self.row = row
+
+    def __eq__(self, other):
+        return isinstance(other, JobView) and other.table is self.table and other.row == self.row
+
+    def __hash__(self):
+        return hash((id(self.table), self.row))
+
+    @property
+    def id(self):
+        return int(self.table.ids[self.row])
+
+    @property
+    def name(self):
+        return self.table.names[self.row]
+
+    @property
+    def duration(self):
+        return float(self.table.durations[self.row])
+
+    @property
+    def min_duration(self):
+        return float(self.table.min_durations[self.row])
+
+    @property
+    def max_duration(self):
+        return float(self.table.max_durations[self.row])
+
+    @property
+    def deadline(self):
+        return _nan_to_none(float(self.table.deadlines[self.row]))
+
+    @property
+    def level(self):
+        return int(self.table.levels[self.row])
+
+    @property
+    def resource_requirements(self):
+        return self.table.requirements(self.row)
+
+    @property
+    def dependencies(self):
+        return self.table.ids[self.table.dependency_rows(self.row)].tolist()
+
+    @property
+    def time_window(self):
+        return self.table.time_windows.get(self.row)
+
+    @property
+    def alternative_resources(self):
+        return self.table.alternative_resources.get(self.row, [])
+
+    @property
+    def actual_duration(self):
+        return float(self.table.actual_durations[self.row])
+
+    @actual_duration.setter
+    def actual_duration(self, value):
+        self.table.actual_durations[self.row] = value
+
+    @property
+    def start_time(self):
+        return _nan_to_none(float(self.table.start_times[self.row]))
+
+    @start_time.setter
+    def start_time(self, value):
+        self.table.start_times[self.row] = np.nan if value is None else value
+
+    @property
+    def end_time(self):
+        return _nan_to_none(float(self.table.end_times[self.row]))
+
+    @end_time.setter
+    def end_time(self, value):
+        self.table.end_times[self.row] = np.nan if value is None else value
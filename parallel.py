@@ -0,0 +1,93 @@
+import os
+import pickle
+import tempfile
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.pool import Pool
+
+import numpy as np
+
+# Job data installed once per worker process by the pool initializer
+_worker_state = {}
+
+
+def _initialize_worker(evaluate, arrays):
+    _worker_state['evaluate'] = evaluate
+    _worker_state['arrays'] = arrays
+
+
+def _evaluate_chunk(positions):
+    return _worker_state['evaluate'](positions, _worker_state['arrays'])
+
+
+def _evaluate_installed(key, path, positions):
+    # Load the job data of evaluator key from path, unless this worker already holds it, then evaluate
+    if _worker_state.get('key') != key:
+        with open(path, 'rb') as file:
+            _worker_state['evaluate'], _worker_state['arrays'] = pickle.load(file)
+        _worker_state['key'] = key
+    return _evaluate_chunk(positions)
+
+
+def _call(task):
+    # Tasks are (function, *args) tuples so any single-iterable map (Executor, Pool, toolbox.map) can run them
+    function, args = task[0], task[1:]
+    return function(*args)
+
+
+class ParallelEvaluator:
+    # Splits population evaluation into one chunk per worker. With workers= the pool is created here and
+    # receives the job arrays once through its initializer. A caller-supplied process pool cannot be given
+    # an initializer, so the arrays are written to a temporary file once and every worker loads them with
+    # its first chunk; later chunks carry only positions. shared=None detects process pools, shared=True
+    # forces this for other executors whose workers are processes; any other executor (anything with a
+    # map method) gets the arrays with each chunk instead of with each particle.
+    def __init__(self, evaluate, arrays, workers=None, executor=None, shared=None):
+        self.evaluate = evaluate
+        self.arrays = arrays
+        self.owns_executor = executor is None and workers is not None and workers > 1
+        if self.owns_executor:
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=_initialize_worker,
+                                           initargs=(evaluate, arrays))
+        self.executor = executor
+        self.workers = workers if workers else os.cpu_count()
+        self.key = self.path = None
+        if shared is None:
+            shared = isinstance(executor, (ProcessPoolExecutor, Pool))
+        if shared and executor is not None and not self.owns_executor:
+            descriptor, self.path = tempfile.mkstemp(suffix='.pickle')
+            with os.fdopen(descriptor, 'wb') as file:
+                pickle.dump((evaluate, arrays), file, protocol=pickle.HIGHEST_PROTOCOL)
+            self.key = uuid.uuid4().hex
+
+    def __call__(self, positions):
+        if self.executor is None:
+            return self.evaluate(positions, self.arrays)
+        chunks = np.array_split(positions, min(self.workers, len(positions)))
+        if self.owns_executor:
+            tasks = [(_evaluate_chunk, chunk) for chunk in chunks]
+        elif self.key is not None:
+            tasks = [(_evaluate_installed, self.key, self.path, chunk) for chunk in chunks]
+        else:
+            tasks = [(self.evaluate, chunk, self.arrays) for chunk in chunks]
+        return np.vstack(list(self.executor.map(_call, tasks)))
+
+    def map(self, function, arguments):
+        # Run function(*args) for every tuple in arguments, in the workers when there are any
+        tasks = [(function,) + tuple(args) for args in arguments]
+        if self.executor is None:
+            return [_call(task) for task in tasks]
+        return list(self.executor.map(_call, tasks))
+
+    def close(self):
+        if self.owns_executor:
+            self.executor.shutdown()
+        if self.path is not None:
+            os.remove(self.path)
+            self.path = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
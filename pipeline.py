@@ -0,0 +1,44 @@
+from deap_solver_dependency import create_production_schedule
+from pulp_solver import pulp_solve, repair_starts
+
+
+def to_pulp_input(jobs):
+    # Convert UncertainProductionJob objects to the job dictionary and dependency list used by pulp_solve.
+    # Levels are the depth of each job in the dependency DAG, starting at 1. A job without resource
+    # requirements (a work order with no operations) gets resource None, which no resource constraint covers.
+    known = {job.id: job for job in jobs}
+    dependencies = [(dependency, job.id) for job in jobs for dependency in job.dependencies if dependency in known]
+    levels = {}
+
+    def level_of(job_id):
+        stack = [job_id]
+        while stack:
+            current = stack[-1]
+            pending = [dep for dep in known[current].dependencies if dep in known and dep not in levels]
+            if pending:
+                stack.extend(pending)
+            else:
+                stack.pop()
+                levels[current] = 1 + max((levels[dep] for dep in known[current].dependencies if dep in known),
+                                          default=0)
+        return levels[job_id]
+
+    pulp_jobs = {}
+    for job in jobs:
+        pulp_jobs[job.id] = {
+            'duration': (job.min_duration + job.max_duration) / 2,
+            'resource': next(iter(job.resource_requirements), None),
+            'level': level_of(job.id),
+            'name': job.name,
+        }
+    return pulp_jobs, dependencies
+
+
+def warm_started_solve(jobs, company_calendar, resource_calendars, resource_mode='disjunctive', **options):
+    # Run the PSO heuristic first and hand its (repaired) start times to CBC as the initial MIP solution
+    scheduled_jobs = create_production_schedule(jobs, company_calendar, resource_calendars)
+    pulp_jobs, dependencies = to_pulp_input(scheduled_jobs)
+    heuristic_starts = {job.id: job.start_time for job in scheduled_jobs}
+    initial_starts = repair_starts(pulp_jobs, dependencies, heuristic_starts)
+    return pulp_solve(pulp_jobs, dependencies, resource_mode=resource_mode, initial_starts=initial_starts,
+                      **options)
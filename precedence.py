@@ -0,0 +1,97 @@
+import heapq
+
+
+class PrecedenceGraph:
+    # Dependency DAG over a job list, built once and reused until the dependencies change.
+    # Gives O(1) id -> job, id -> list index and id -> topological position lookups.
+    def __init__(self, jobs):
+        self.jobs = jobs
+        self.invalidate()
+
+    def invalidate(self):
+        # Drop the cached structure; it is rebuilt on the next lookup
+        self._built = False
+
+    def set_dependencies(self, job_id, dependencies):
+        # Change one job's dependencies and invalidate the cache
+        self.job(job_id).dependencies = list(dependencies)
+        self.invalidate()
+
+    def _build(self):
+        self._index = {job.id: i for i, job in enumerate(self.jobs)}
+        self._predecessors = {job.id: [dep for dep in job.dependencies if dep in self._index] for job in self.jobs}
+        self._successors = {job.id: [] for job in self.jobs}
+        for job in self.jobs:
+            for dep in self._predecessors[job.id]:
+                self._successors[dep].append(job.id)
+
+        # Kahn's algorithm, generation by generation, in the same order as networkx.topological_sort
+        # on the graph create_dag builds (nodes in order of first appearance, edges in insertion order)
+        node_order = {}
+        for job in self.jobs:
+            node_order.setdefault(job.id, len(node_order))
+            for dep in self._predecessors[job.id]:
+                node_order.setdefault(dep, len(node_order))
+        indegree = {job_id: len(deps) for job_id, deps in self._predecessors.items()}
+        generation = sorted((job_id for job_id, degree in indegree.items() if degree == 0), key=node_order.get)
+        order = []
+        while generation:
+            order.extend(generation)
+            next_generation = []
+            for job_id in generation:
+                for succ in self._successors[job_id]:
+                    indegree[succ] -= 1
+                    if indegree[succ] == 0:
+                        next_generation.append(succ)
+            generation = next_generation
+        if len(order) != len(self.jobs):
+            raise ValueError("Job dependencies contain a cycle")
+        self._order = order
+        self._topo_position = {job_id: i for i, job_id in enumerate(order)}
+        self._built = True
+
+    def _ensure_built(self):
+        if not self._built:
+            self._build()
+
+    @property
+    def order(self):
+        # Job ids in topological order
+        self._ensure_built()
+        return self._order
+
+    def index(self, job_id):
+        self._ensure_built()
+        return self._index[job_id]
+
+    def job(self, job_id):
+        return self.jobs[self.index(job_id)]
+
+    def topo_position(self, job_id):
+        self._ensure_built()
+        return self._topo_position[job_id]
+
+    def predecessors(self, job_id):
+        self._ensure_built()
+        return self._predecessors[job_id]
+
+    def successors(self, job_id):
+        self._ensure_built()
+        return self._successors[job_id]
+
+    def priority_order(self, key):
+        # Topological order that always continues with the ready job of smallest key(job)
+        self._ensure_built()
+        waiting = {job_id: len(deps) for job_id, deps in self._predecessors.items()}
+        heap = [(key(self.job(job_id)), self._topo_position[job_id], job_id)
+                for job_id, count in waiting.items() if count == 0]
+        heapq.heapify(heap)
+        order = []
+        while heap:
+            _, _, job_id = heapq.heappop(heap)
+            order.append(job_id)
+            for succ in self._successors[job_id]:
+                waiting[succ] -= 1
+                if waiting[succ] == 0:
+                    heapq.heappush(heap, (key(self.job(succ)), self._topo_position[succ], succ))
+        return order
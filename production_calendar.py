@@ -0,0 +1,245 @@
+from bisect import bisect_left, bisect_right
+
+
+class TimeSlot:
+    def __init__(self, start, end):
+        self.start = start
+        self.end = end
+
+
+class ProductionCalendar:
+    # Work periods plus a sorted, merged interval index over them. Periods are closed intervals, as in the
+    # original linear scans (start <= t <= end). Call invalidate() after editing work_periods in place.
+    def __init__(self, work_periods):
+        self.work_periods = [TimeSlot(start, end) for start, end in work_periods]
+        self.invalidate()
+
+    def invalidate(self):
+        self._starts = None
+
+    def _ensure_index(self):
+        if self._starts is not None:
+            return
+        starts, ends = [], []
+        for slot in sorted(self.work_periods, key=lambda slot: slot.start):
+            if slot.end < slot.start:
+                continue
+            if ends and slot.start <= ends[-1]:
+                ends[-1] = max(ends[-1], slot.end)
+            else:
+                starts.append(slot.start)
+                ends.append(slot.end)
+        # cumulative[i] is the total working time in the first i merged intervals
+        cumulative = [0]
+        for start, end in zip(starts, ends):
+            cumulative.append(cumulative[-1] + end - start)
+        self._starts, self._ends, self._cumulative = starts, ends, cumulative
+
+    @property
+    def intervals(self):
+        # Merged (start, end) intervals in time order
+        self._ensure_index()
+        return list(zip(self._starts, self._ends))
+
+    def is_available(self, t):
+        self._ensure_index()
+        i = bisect_right(self._starts, t) - 1
+        return i >= 0 and t <= self._ends[i]
+
+    def next_available(self, t):
+        # Earliest time >= t inside a work period, or None when the calendar has no more work periods
+        self._ensure_index()
+        i = bisect_right(self._starts, t) - 1
+        if i >= 0 and t <= self._ends[i]:
+            return t
+        return self._starts[i + 1] if i + 1 < len(self._starts) else None
+
+    def available_capacity(self, t0, t1):
+        # Working time inside [t0, t1]
+        self._ensure_index()
+        if t1 <= t0:
+            return 0
+        return self._working_time_until(t1) - self._working_time_until(t0)
+
+    def _working_time_until(self, t):
+        i = bisect_right(self._starts, t)
+        if i == 0:
+            return 0
+        return self._cumulative[i - 1] + min(t, self._ends[i - 1]) - self._starts[i - 1]
+
+
+class ResourceAvailabilityIndex:
+    # Answers "which resources are working at t" with one bisect. The timeline is cut at every period
+    # boundary of every calendar; each boundary point and each gap between two boundaries stores the tuple
+    # of available resources (in calendar order). Rebuild it when any of the calendars change.
+    def __init__(self, resource_calendars):
+        self.resources = list(resource_calendars)
+        boundaries = sorted({time for calendar in resource_calendars.values()
+                             for start, end in calendar.intervals for time in (start, end)})
+        self.boundaries = boundaries
+        self.at_boundary = [self._available(resource_calendars, time) for time in boundaries]
+        self.between = [self._available(resource_calendars, (left + right) / 2)
+                        for left, right in zip(boundaries, boundaries[1:])]
+
+    def _available(self, resource_calendars, t):
+        return tuple(resource for resource in self.resources if resource_calendars[resource].is_available(t))
+
+    def available_at(self, t):
+        i = bisect_left(self.boundaries, t)
+        if i < len(self.boundaries) and self.boundaries[i] == t:
+            return self.at_boundary[i]
+        if i == 0 or i == len(self.boundaries):
+            return ()
+        return self.between[i - 1]
+
+
+def intersect_periods(periods, other_periods):
+    # Intersection of two sorted lists of (start, end) periods
+    result = []
+    i = j = 0
+    while i < len(periods) and j < len(other_periods):
+        start = max(periods[i][0], other_periods[j][0])
+        end = min(periods[i][1], other_periods[j][1])
+        if start < end:
+            result.append((start, end))
+        if periods[i][1] < other_periods[j][1]:
+            i += 1
+        else:
+            j += 1
+    return result
+
+
+def merge_periods(periods):
+    # Sorted (start, end) periods with overlapping or touching ones joined
+    merged = []
+    for start, end in sorted(periods):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class WorkingTimeCalendar:
+    # Base for calendars that describe working time day by day. Subclasses implement _periods_for_day(day),
+    # returning absolute (start, end) periods; days are generated on demand and cached, never for the
+    # whole horizon up front. Times are hours from the start of day 0. A period may run past midnight into
+    # the next day (a night shift such as (22, 30)), but not further.
+    day_length = 24
+    max_idle_days = 366
+
+    def __init__(self):
+        self._days = {}
+        self._windows = {}
+
+    def day_periods(self, day):
+        if day not in self._days:
+            self._days[day] = self._periods_for_day(day)
+        return self._days[day]
+
+    def day_window(self, day):
+        # Working time within day itself: its own periods plus the part of the previous day's periods that
+        # runs past midnight, merged and cut at both midnights
+        if day not in self._windows:
+            start = day * self.day_length
+            periods = merge_periods(self.day_periods(day - 1) + self.day_periods(day))
+            self._windows[day] = intersect_periods(periods, [(start, start + self.day_length)])
+        return self._windows[day]
+
+    def iter_periods(self, t):
+        # Lazily yield the working periods that end after t, in time order, cut at midnight
+        day = int(t // self.day_length)
+        idle_days = 0
+        while True:
+            periods = [period for period in self.day_window(day) if period[1] > t]
+            if periods:
+                idle_days = 0
+                yield from periods
+            else:
+                idle_days += 1
+                if idle_days > self.max_idle_days:
+                    raise ValueError(f"No working time within {self.max_idle_days} days after {t}")
+            day += 1
+
+    def next_working_time(self, t):
+        # Earliest time >= t at which work can happen
+        start, end = next(self.iter_periods(t))
+        return max(start, t)
+
+    def add_working_time(self, start, duration):
+        # Wall-clock time at which `duration` hours of work that begin at `start` are finished,
+        # continuing across breaks, nights, weekends and holidays
+        if duration <= 0:
+            return start
+        remaining = duration
+        for period_start, period_end in self.iter_periods(start):
+            begin = max(period_start, start)
+            if remaining <= period_end - begin:
+                return begin + remaining
+            remaining -= period_end - begin
+
+    def intersection(self, *others):
+        return IntersectedCalendar((self,) + others)
+
+
+class ShiftCalendar(WorkingTimeCalendar):
+    # Recurring shift pattern: daily_periods are hours of the day (e.g. [(8, 12), (13, 17)]), weekly_periods
+    # overrides them per weekday (0 = Monday, an empty list means a day off). Holidays and exceptions are
+    # day numbers, or dates when start_date (the date of day 0) is given; an exception replaces that day's
+    # periods, for instance overtime or maintenance on one resource.
+    def __init__(self, daily_periods=(), weekly_periods=None, holidays=(), exceptions=None, start_date=None):
+        super().__init__()
+        self.daily_periods = sorted(daily_periods)
+        self.weekly_periods = {weekday: sorted(periods) for weekday, periods in (weekly_periods or {}).items()}
+        self.start_date = start_date
+        self.first_weekday = start_date.weekday() if start_date is not None else 0
+        self.holidays = {self._day_number(day) for day in holidays}
+        self.exceptions = {self._day_number(day): sorted(periods) for day, periods in (exceptions or {}).items()}
+
+    @classmethod
+    def from_production_calendar(cls, calendar, **options):
+        # Treat a single-day ProductionCalendar as a pattern that repeats every day
+        return cls([(slot.start, slot.end) for slot in calendar.work_periods], **options)
+
+    def _day_number(self, day):
+        if isinstance(day, int):
+            return day
+        return (day - self.start_date).days
+
+    def with_exceptions(self, exceptions, holidays=()):
+        # Same pattern with extra exceptions and holidays, e.g. for a single resource
+        merged_exceptions = dict(self.exceptions)
+        merged_exceptions.update({self._day_number(day): periods for day, periods in exceptions.items()})
+        return ShiftCalendar(self.daily_periods, self.weekly_periods, self.holidays | set(holidays),
+                             merged_exceptions, self.start_date)
+
+    def _periods_for_day(self, day):
+        if day in self.exceptions:
+            periods = self.exceptions[day]
+        elif day in self.holidays:
+            periods = []
+        else:
+            periods = self.weekly_periods.get((self.first_weekday + day) % 7, self.daily_periods)
+        offset = day * self.day_length
+        return [(offset + start, offset + end) for start, end in periods]
+
+
+class IntersectedCalendar(WorkingTimeCalendar):
+    # Working time shared by several calendars, e.g. the company calendar and a resource calendar
+    def __init__(self, calendars):
+        super().__init__()
+        self.calendars = calendars
+
+    def _periods_for_day(self, day):
+        # Day windows, so night shifts that started the day before take part in the intersection
+        periods = self.calendars[0].day_window(day)
+        for calendar in self.calendars[1:]:
+            periods = intersect_periods(periods, calendar.day_window(day))
+        return periods
+
+
+def as_working_time_calendar(calendar):
+    # Accept ShiftCalendar-style calendars as they are and treat a ProductionCalendar as a daily pattern
+    if calendar is None or isinstance(calendar, WorkingTimeCalendar):
+        return calendar
+    return ShiftCalendar.from_production_calendar(calendar)
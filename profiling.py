@@ -0,0 +1,140 @@
+import json
+import os
+import threading
+import time
+
+# The active Profiler, or None. Every hook checks this first, so disabled instrumentation costs one call.
+_profiler = None
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    def __init__(self, profiler, name, args):
+        self.profiler = profiler
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.profiler.record(self.name, self.start, time.perf_counter_ns(), self.args)
+        return False
+
+
+class Profiler:
+    # Collects spans (name, start, duration), counters and named traces of per-iteration values.
+    # Times are microseconds since the profiler was created, as the Chrome trace format expects.
+    def __init__(self):
+        self.origin = time.perf_counter_ns()
+        self.pid = os.getpid()
+        self.spans = []
+        self.counters = {}
+        self.traces = {}
+
+    def _microseconds(self, nanoseconds):
+        return (nanoseconds - self.origin) / 1000
+
+    def span(self, name, **args):
+        return Span(self, name, args)
+
+    def record(self, name, start, end, args=None):
+        self.spans.append({'name': name, 'ts': self._microseconds(start), 'dur': (end - start) / 1000,
+                           'tid': threading.get_ident(), 'args': args or {}})
+
+    def count(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def trace(self, name, **values):
+        # Arrays are stored as lists; callers pass them as they are so a disabled trace converts nothing
+        values = {key: value.tolist() if hasattr(value, 'tolist') else value for key, value in values.items()}
+        self.traces.setdefault(name, []).append(dict(values, ts=self._microseconds(time.perf_counter_ns())))
+
+    def summary(self):
+        # Number of spans and total seconds per span name
+        totals = {}
+        for span in self.spans:
+            entry = totals.setdefault(span['name'], {'count': 0, 'seconds': 0.0})
+            entry['count'] += 1
+            entry['seconds'] += span['dur'] / 1e6
+        return totals
+
+    def chrome_trace(self):
+        # Spans become complete ('X') events and every numeric trace value a counter ('C') series
+        events = [{'name': span['name'], 'ph': 'X', 'ts': span['ts'], 'dur': span['dur'], 'pid': self.pid,
+                   'tid': span['tid'], 'args': span['args']} for span in self.spans]
+        for name, points in self.traces.items():
+            for point in points:
+                values = {}
+                for key, value in point.items():
+                    if isinstance(value, list):
+                        values.update((f"{key}_{i}", item) for i, item in enumerate(value))
+                    elif key != 'ts' and isinstance(value, (int, float)):
+                        values[key] = value
+                events.append({'name': name, 'ph': 'C', 'ts': point['ts'], 'pid': self.pid, 'args': values})
+        end = max((event['ts'] + event.get('dur', 0) for event in events), default=0)
+        if self.counters:
+            events.append({'name': 'counters', 'ph': 'C', 'ts': end, 'pid': self.pid, 'args': self.counters})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def export_chrome_trace(self, path):
+        # Load in chrome://tracing or https://ui.perfetto.dev
+        with open(path, 'w') as file:
+            json.dump(self.chrome_trace(), file)
+
+    def export_log(self, path):
+        # JSON Lines: one record per span and trace point, then the counters and the per-span summary
+        with open(path, 'w') as file:
+            for span in self.spans:
+                file.write(json.dumps(dict(span, type='span')) + '\n')
+            for name, points in self.traces.items():
+                for point in points:
+                    file.write(json.dumps(dict(point, type='trace', name=name)) + '\n')
+            file.write(json.dumps({'type': 'counters', 'counters': self.counters}) + '\n')
+            file.write(json.dumps({'type': 'summary', 'spans': self.summary()}) + '\n')
+
+
+def enable(profiler=None):
+    # Start collecting into profiler (a new one by default) and return it
+    global _profiler
+    _profiler = profiler if profiler is not None else Profiler()
+    return _profiler
+
+
+def disable():
+    # Stop collecting and return the profiler that was active
+    global _profiler
+    profiler, _profiler = _profiler, None
+    return profiler
+
+
+def active():
+    return _profiler
+
+
+def span(name, **args):
+    # with span("model_build"): ...
+    if _profiler is None:
+        return _NULL_SPAN
+    return _profiler.span(name, **args)
+
+
+def count(name, value=1):
+    if _profiler is not None:
+        _profiler.count(name, value)
+
+
+def trace(name, **values):
+    if _profiler is not None:
+        _profiler.trace(name, **values)
@@ -4,11 +4,16 @@ from tkinter import simpledialog
 from pulp_solver import *
 from deap_solver import *
 import json
+import os
 from tkinter import ttk
 from data import *
+import profiling
+from schedule_cache import ScheduleCache, cached_production_schedule
 
 root = tk.Tk()
 data = []  # Global result variable
+# Reruns on unchanged data are served from here; set SCHEDULE_CACHE_DIR to keep results across restarts
+schedule_cache = ScheduleCache(directory=os.environ.get('SCHEDULE_CACHE_DIR'))
 
 
 def show_dialog():
@@ -72,7 +77,7 @@ def convert_to_task_structure(jobs):
             'start_time': job.start_time if job.start_time else 0.0,
             'end_time': job.end_time if job.end_time else 0.0,
             'color': 'blue',
-            'resource_id': next(iter(job.resource_requirements)),
+            'resource_id': next(iter(job.resource_requirements), None),
             'job_name': job.name
         })
     return task_structure
@@ -123,11 +128,14 @@ def create_gantt_chart(schedule):
 
 
 def run_algorithm_and_update_gui(algorithm):
-    if algorithm == "DEAP":
-        schedule = get_production_schedule_deap()
-        create_gantt_chart(convert_to_task_structure(schedule))
-    else:
-        create_gantt_chart({})
+    with profiling.span("planning_run", algorithm=algorithm):
+        if algorithm == "DEAP":
+            schedule = get_production_schedule_deap()
+            with profiling.span("gantt"):
+                create_gantt_chart(convert_to_task_structure(schedule))
+        else:
+            with profiling.span("gantt"):
+                create_gantt_chart({})
 
 
 def get_production_schedule_deap():
@@ -137,7 +145,8 @@ def get_production_schedule_deap():
     current_time = 0
     jobs.sort(key=lambda job: dynamic_priority(job, current_time), reverse=True)
 
-    scheduled_jobs = create_production_schedule(jobs, company_calendar, resource_calendars)
+    scheduled_jobs = cached_production_schedule(schedule_cache, create_production_schedule, jobs, company_calendar,
+                                                resource_calendars)
     return scheduled_jobs
 
 
@@ -213,8 +222,14 @@ def main():
     canvas = tk.Canvas(root, width=canvas_width, height=canvas_height, bg='white')
     canvas.pack(fill=tk.BOTH, expand=True)  # Fill the whole window
     root.canvas = canvas  # Attach canvas to the root to access it later
+    # Set PROFILE_TRACE to a file name to record where a session spends its time as a Chrome trace
+    profile_path = os.environ.get('PROFILE_TRACE')
+    if profile_path:
+        profiling.enable()
     run_algorithm_and_update_gui("DEAP")  # Initial chart
     root.mainloop()
+    if profile_path:
+        profiling.disable().export_chrome_trace(profile_path)
 
 
 def apply_root_filter(option):
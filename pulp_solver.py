@@ -1,60 +1,409 @@
+import heapq
+import math
+from bisect import bisect_left
+from collections import defaultdict, deque
+from fractions import Fraction
+
 import pulp
 
+import profiling
+
+# How jobs sharing a resource are kept apart: 'level' keeps the original same-level start coupling,
+# 'disjunctive' adds ordering binaries for pairs on the same resource that the dependencies leave unordered.
+# The time-indexed formulation always keeps resources exclusive, so it only accepts 'disjunctive' (or None).
+RESOURCE_MODES = ('level', 'disjunctive')
+# 'continuous' models start times directly, 'time_indexed' picks a start bucket per job and caps every
+# resource at one job per bucket, only using buckets that fall inside the calendars' work periods
+FORMULATIONS = ('continuous', 'time_indexed')
+# Slack allowed on bounds, constraints and integrality when checking a solver's values
+FEASIBILITY_TOLERANCE = 1e-6
+
+
+def index_jobs(jobs, dependencies):
+    # Predecessors of every job, jobs grouped by level and then by resource, and jobs per resource.
+    # Jobs whose resource is None use no resource and appear in neither grouping.
+    predecessors = defaultdict(list)
+    for before, after in dependencies:
+        predecessors[after].append(before)
+    levels = defaultdict(lambda: defaultdict(list))
+    resources = defaultdict(list)
+    for job_id, job in jobs.items():
+        if job['resource'] is not None:
+            levels[job['level']][job['resource']].append(job_id)
+            resources[job['resource']].append(job_id)
+    return predecessors, levels, resources
+
+
+def topological_order(jobs, predecessors):
+    # Kahn's algorithm over the dependency edges between known jobs
+    successors = defaultdict(list)
+    indegree = dict.fromkeys(jobs, 0)
+    for job_id in jobs:
+        for dep in predecessors.get(job_id, ()):
+            if dep in jobs:
+                successors[dep].append(job_id)
+                indegree[job_id] += 1
+    queue = deque(job_id for job_id, degree in indegree.items() if degree == 0)
+    order = []
+    while queue:
+        job_id = queue.popleft()
+        order.append(job_id)
+        for succ in successors[job_id]:
+            indegree[succ] -= 1
+            if indegree[succ] == 0:
+                queue.append(succ)
+    if len(order) != len(jobs):
+        raise ValueError("Job dependencies contain a cycle")
+    return order, successors
+
+
+def time_bounds(jobs, predecessors, successors, order):
+    # Earliest start from the longest predecessor chain, latest start from the longest successor chain.
+    # The horizon is the serial makespan, which bounds every left-justified schedule.
+    horizon = sum(job['duration'] for job in jobs.values())
+    earliest = {}
+    for job_id in order:
+        earliest[job_id] = max((earliest[dep] + jobs[dep]['duration'] for dep in predecessors.get(job_id, ())
+                                if dep in jobs), default=0)
+    tails = {}
+    for job_id in reversed(order):
+        tails[job_id] = max((tails[succ] + jobs[succ]['duration'] for succ in successors[job_id]), default=0)
+    latest = {job_id: horizon - tails[job_id] - jobs[job_id]['duration'] for job_id in jobs}
+    return earliest, latest
+
+
+def ancestor_masks(jobs, predecessors, order):
+    # Transitive closure of the dependency DAG as one bitset of ancestors per job
+    position = {job_id: i for i, job_id in enumerate(order)}
+    masks = {}
+    for job_id in order:
+        mask = 0
+        for dep in predecessors.get(job_id, ()):
+            if dep in position:
+                mask |= masks[dep] | (1 << position[dep])
+        masks[job_id] = mask
+    return masks, position
+
+
+def unordered_pairs(job_ids, masks, position):
+    # Pairs of jobs neither of which is an ancestor of the other
+    for a in range(len(job_ids)):
+        i = job_ids[a]
+        for b in range(a + 1, len(job_ids)):
+            j = job_ids[b]
+            if not (masks[j] >> position[i] & 1 or masks[i] >> position[j] & 1):
+                yield i, j
+
+
+def bucket_is_open(calendars, start, end, day_length=24):
+    # Work periods repeat every day; a bucket is open when each calendar has a period covering all of it
+    offset = start % day_length
+    offset_end = offset + (end - start)
+    return all(any(period.start <= offset and offset_end <= period.end for period in calendar.work_periods)
+               for calendar in calendars)
+
+
+def open_buckets(calendars, bucket_size, horizon):
+    # Numbers of the open buckets below horizon, in time order
+    return [t for t in range(horizon) if bucket_is_open(calendars, t * bucket_size, (t + 1) * bucket_size)]
+
+
+def calendar_period(bucket_size, day_length=24):
+    # Number of buckets after which the open buckets repeat: the least common multiple of the day length
+    # and the bucket size, counted in buckets (24 for 7-hour buckets, 48 for half-hour buckets)
+    day, bucket = Fraction(day_length).limit_denominator(), Fraction(bucket_size).limit_denominator()
+    return math.lcm(day.numerator * bucket.denominator, bucket.numerator * day.denominator) // (
+        bucket.numerator * day.denominator)
+
+
+def serial_horizon(order, lengths, calendars_for, bucket_size, day_length=24):
+    # Number of buckets needed to run every job back to back in dependency order, each in the open buckets
+    # of its calendars (continuing across closed ones), which is always enough room for a feasible
+    # time-indexed schedule
+    period = calendar_period(bucket_size, day_length)
+    patterns = {}
+    current = 0
+    for job_id in order:
+        calendars = calendars_for(job_id)
+        key = tuple(id(calendar) for calendar in calendars)
+        if key not in patterns:
+            patterns[key] = open_buckets(calendars, bucket_size, period)
+        pattern = patterns[key]
+        if not pattern:
+            raise ValueError(f"Job {job_id} has no working time in its calendars")
+        # The job ends after the lengths[job_id]-th open bucket at or after current
+        cycles, offset = divmod(current, period)
+        last = bisect_left(pattern, offset) + lengths[job_id] - 1
+        current = (cycles + last // len(pattern)) * period + pattern[last % len(pattern)] + 1
+    return current
+
+
+def warm_start_buckets(jobs, predecessors, successors, order, occupied, initial_starts):
+    # Heuristic start times turned into start buckets the model accepts: jobs are list-scheduled in order of
+    # their given start (dependencies first), each in the first allowed start bucket after its predecessors'
+    # last buckets whose buckets are still free on its resource. None when a job finds no such bucket.
+    waiting = {job_id: sum(1 for dep in predecessors.get(job_id, ()) if dep in jobs) for job_id in jobs}
+    ready = dict.fromkeys(jobs, 0)
+    busy = defaultdict(set)
+    position = {job_id: i for i, job_id in enumerate(order)}
+    heap = [(initial_starts.get(job_id) or 0, position[job_id], job_id) for job_id in order if waiting[job_id] == 0]
+    heapq.heapify(heap)
+    chosen = {}
+    while heap:
+        _, _, job_id = heapq.heappop(heap)
+        resource = jobs[job_id]['resource']
+        chosen[job_id] = next((t for t, buckets in occupied[job_id].items()
+                               if t >= ready[job_id] and busy[resource].isdisjoint(buckets)), None)
+        if chosen[job_id] is None:
+            return None
+        buckets = occupied[job_id][chosen[job_id]]
+        if resource is not None:
+            busy[resource].update(buckets)
+        for succ in successors[job_id]:
+            ready[succ] = max(ready[succ], buckets[-1] + 1)
+            waiting[succ] -= 1
+            if waiting[succ] == 0:
+                heapq.heappush(heap, (initial_starts.get(succ) or 0, position[succ], succ))
+    return chosen
+
+
+def build_time_indexed_model(jobs, dependencies, bucket_size=1, company_calendar=None, resource_calendars=None,
+                             initial_starts=None):
+    predecessors, levels, resources = index_jobs(jobs, dependencies)
+    order, successors = topological_order(jobs, predecessors)
+    resource_calendars = resource_calendars or {}
+
+    def calendars_for(job_id):
+        calendars = [company_calendar] if company_calendar is not None else []
+        if jobs[job_id]['resource'] in resource_calendars:
+            calendars.append(resource_calendars[jobs[job_id]['resource']])
+        return calendars
+
+    # Job lengths in whole open buckets, and earliest starts ignoring closed buckets
+    lengths = {job_id: max(1, math.ceil(job['duration'] / bucket_size)) for job_id, job in jobs.items()}
+    earliest = {}
+    for job_id in order:
+        earliest[job_id] = max((earliest[dep] + lengths[dep] for dep in predecessors.get(job_id, ()) if dep in jobs),
+                               default=0)
+    horizon = serial_horizon(order, lengths, calendars_for, bucket_size)
+
+    # A job that starts in an open bucket runs in that and the next open buckets until it has lengths of
+    # them, continuing across breaks, nights and days off; occupied[job][t] lists those buckets
+    open_by_resource = {}
+    occupied = {}
+    for job_id in jobs:
+        resource = jobs[job_id]['resource']
+        if resource not in open_by_resource:
+            open_by_resource[resource] = open_buckets(calendars_for(job_id), bucket_size, horizon)
+        open_list = open_by_resource[resource]
+        length = lengths[job_id]
+        occupied[job_id] = {open_list[i]: open_list[i:i + length]
+                            for i in range(bisect_left(open_list, earliest[job_id]), len(open_list) - length + 1)}
 
-# Sample data
-def pulp_solve(jobs, dependencies):
-    # Create a list of resources
-    resources = set(job['resource'] for job in jobs.values())
+    # Initialize the problem
+    problem = pulp.LpProblem("Production Scheduling", pulp.LpMinimize)
+    # Define decision variables: one binary per job and allowed start bucket
+    starts = {job_id: {t: pulp.LpVariable(f"Start_{job_id}_{t}", cat='Binary') for t in occupied[job_id]}
+              for job_id in jobs}
+    start_times = {job_id: pulp.lpSum(bucket_size * t * var for t, var in starts[job_id].items()) for job_id in jobs}
+    # The job finishes inside its last bucket, once the work left after the earlier buckets is done
+    end_times = {job_id: pulp.lpSum((bucket_size * (occupied[job_id][t][-1] - lengths[job_id] + 1)
+                                     + jobs[job_id]['duration']) * var for t, var in starts[job_id].items())
+                 for job_id in jobs}
+    if initial_starts is not None:
+        # Warm start: the heuristic schedule repaired in bucket units, so it satisfies the model
+        chosen = warm_start_buckets(jobs, predecessors, successors, order, occupied, initial_starts)
+        if chosen is not None:
+            for job_id, job_starts in starts.items():
+                for t, var in job_starts.items():
+                    var.setInitialValue(1 if t == chosen[job_id] else 0)
+    # Set objective function (minimize completion time, for example)
+    problem += pulp.lpSum(start_times.values()) + sum(job['duration'] for job in jobs.values())
+    # Every job starts exactly once
+    for job_id in jobs:
+        problem += pulp.lpSum(starts[job_id].values()) == 1
+    # Add constraints, one per dependency edge
+    for job_id in jobs:
+        for dep in predecessors.get(job_id, ()):
+            problem += end_times[dep] <= start_times[job_id]
+    # Resource constraint: at most one running job per resource and bucket
+    for resource, job_ids in resources.items():
+        running = defaultdict(list)
+        for job_id in job_ids:
+            for t, var in starts[job_id].items():
+                for bucket in occupied[job_id][t]:
+                    running[bucket].append(var)
+        for bucket, variables in running.items():
+            if len(variables) > 1:
+                problem += pulp.lpSum(variables) <= 1
+    return problem, start_times, end_times
+
+
+def set_initial_starts(start_times, initial_starts):
+    # Warm start values for the continuous start-time variables; values outside a variable's bounds are
+    # skipped, which leaves the warm start incomplete and therefore unused
+    if initial_starts is not None:
+        for job_id, var in start_times.items():
+            var.setInitialValue(initial_starts[job_id], check=False)
+
+
+def repair_starts(jobs, dependencies, starts):
+    # Turn heuristic start times into a schedule that respects dependencies and keeps jobs on the same
+    # resource apart: jobs are list-scheduled in order of their given start, as early as possible
+    predecessors, levels, resources = index_jobs(jobs, dependencies)
+    order, successors = topological_order(jobs, predecessors)
+    waiting = {job_id: sum(1 for dep in predecessors.get(job_id, ()) if dep in jobs) for job_id in jobs}
+    ready_at = dict.fromkeys(jobs, 0)
+    resource_free = defaultdict(float)
+    position = {job_id: i for i, job_id in enumerate(order)}
+    heap = [(starts.get(job_id) or 0, position[job_id], job_id) for job_id in order if waiting[job_id] == 0]
+    heapq.heapify(heap)
+    repaired = {}
+    while heap:
+        _, _, job_id = heapq.heappop(heap)
+        resource = jobs[job_id]['resource']
+        repaired[job_id] = max(ready_at[job_id], resource_free[resource])
+        end_time = repaired[job_id] + jobs[job_id]['duration']
+        if resource is not None:
+            resource_free[resource] = end_time
+        for succ in successors[job_id]:
+            ready_at[succ] = max(ready_at[succ], end_time)
+            waiting[succ] -= 1
+            if waiting[succ] == 0:
+                heapq.heappush(heap, (starts.get(succ) or 0, position[succ], succ))
+    return repaired
+
+
+def build_model(jobs, dependencies, resource_mode=None, formulation='continuous', bucket_size=1,
+                company_calendar=None, resource_calendars=None, initial_starts=None):
+    # resource_mode None is 'level' for the continuous formulation
+    if resource_mode is not None and resource_mode not in RESOURCE_MODES:
+        raise ValueError(f"Unknown resource mode {resource_mode!r}, expected one of {RESOURCE_MODES}")
+    if formulation not in FORMULATIONS:
+        raise ValueError(f"Unknown formulation {formulation!r}, expected one of {FORMULATIONS}")
+    if formulation == 'time_indexed':
+        if resource_mode == 'level':
+            raise ValueError("The time-indexed formulation keeps jobs on the same resource apart; "
+                             "resource_mode 'level' only applies to the continuous formulation")
+        return build_time_indexed_model(jobs, dependencies, bucket_size, company_calendar, resource_calendars,
+                                        initial_starts)
+    predecessors, levels, resources = index_jobs(jobs, dependencies)
     # Initialize the problem
     problem = pulp.LpProblem("Production Scheduling", pulp.LpMinimize)
     # Define decision variables
     start_times = {job_id: pulp.LpVariable(f"Start_{job_id}", lowBound=0, cat='Continuous') for job_id in jobs}
     # Set objective function (minimize completion time, for example)
-    problem += pulp.lpSum([start_times[job_id] + jobs[job_id]['duration'] for job_id in jobs])
-    # Add constraints
+    problem += pulp.lpSum(start_times.values()) + sum(job['duration'] for job in jobs.values())
+    # Add constraints, one per dependency edge
     for job_id in jobs:
-        for dep in dependencies:
-            if dep[1] == job_id:
-                problem += start_times[dep[0]] + jobs[dep[0]]['duration'] <= start_times[job_id]
+        for dep in predecessors.get(job_id, ()):
+            problem += start_times[dep] + jobs[dep]['duration'] <= start_times[job_id]
+
+    if resource_mode == 'disjunctive':
+        # Resource constraint: jobs on the same resource never overlap. Only pairs the dependencies leave
+        # unordered need a binary, and each pair gets the smallest big-M its start-time bounds allow.
+        order, successors = topological_order(jobs, predecessors)
+        earliest, latest = time_bounds(jobs, predecessors, successors, order)
+        masks, position = ancestor_masks(jobs, predecessors, order)
+        for job_id, var in start_times.items():
+            var.lowBound = earliest[job_id]
+            var.upBound = latest[job_id]
+        for resource, job_ids in resources.items():
+            for i, j in unordered_pairs(job_ids, masks, position):
+                i_first = pulp.LpVariable(f"Order_{i}_{j}", cat='Binary')
+                big_m_i = latest[i] + jobs[i]['duration'] - earliest[j]
+                big_m_j = latest[j] + jobs[j]['duration'] - earliest[i]
+                problem += start_times[i] + jobs[i]['duration'] <= start_times[j] + big_m_i * (1 - i_first)
+                problem += start_times[j] + jobs[j]['duration'] <= start_times[i] + big_m_j * i_first
+                if initial_starts is not None:
+                    i_first.setInitialValue(1 if initial_starts[i] <= initial_starts[j] else 0)
+        set_initial_starts(start_times, initial_starts)
+        return problem, start_times, None
+
     # Resource constraint: jobs on the same level with different resources start at the same time
-    for level in set(job['level'] for job in jobs.values()):
-        jobs_same_level = [job_id for job_id, job in jobs.items() if job['level'] == level]
-        resources_same_level = set(jobs[job_id]['resource'] for job_id in jobs_same_level)
-        if len(resources_same_level) > 1:
-            for res in resources_same_level:
-                jobs_same_res = [job_id for job_id in jobs_same_level if jobs[job_id]['resource'] == res]
+    for level, jobs_by_resource in levels.items():
+        if len(jobs_by_resource) > 1:
+            for jobs_same_res in jobs_by_resource.values():
                 for i in range(1, len(jobs_same_res)):
                     problem += start_times[jobs_same_res[i - 1]] == start_times[jobs_same_res[i]]
+    set_initial_starts(start_times, initial_starts)
+    return problem, start_times, None
 
-    # Solve the problem
-    problem.solve()
-    if pulp.LpStatus[problem.status] == "Optimal":
-        schedule = {}
-        for job_id, var in start_times.items():
-            job_name = jobs[job_id]['name']
-            start_time = var.varValue
+
+def format_schedule(jobs, start_times, end_times=None):
+    # end_times are given when a job's end is not its start plus its duration (the time-indexed model)
+    schedule = {}
+    for job_id, var in start_times.items():
+        job_name = jobs[job_id]['name']
+        start_time = pulp.value(var)
+        if end_times is None:
             end_time = start_time + jobs[job_id]['duration']
-            time_slot = int(start_time / 100)  # Group tasks based on time slots
-
-            task_info = {
-                'task_id': job_id,
-                'start_time': start_time,
-                'end_time': end_time,
-                'color': 'blue',
-                'resource_id': jobs[job_id]['resource'],
-                'level': jobs[job_id]['level'],
-                'job_name': job_name
-            }
-
-            if time_slot in schedule:
-                schedule[time_slot].append(task_info)
-            else:
-                schedule[time_slot] = [task_info]
-
-        # Sorting the schedule dictionary by keys (time slots)
-        formatted_schedule = {slot: schedule[slot] for slot in sorted(schedule.keys())}
-        # Returning the formatted_schedule
-        return formatted_schedule
+        else:
+            end_time = pulp.value(end_times[job_id])
+        time_slot = int(start_time / 100)  # Group tasks based on time slots
+
+        task_info = {
+            'task_id': job_id,
+            'start_time': start_time,
+            'end_time': end_time,
+            'color': 'blue',
+            'resource_id': jobs[job_id]['resource'],
+            'level': jobs[job_id]['level'],
+            'job_name': job_name
+        }
+
+        if time_slot in schedule:
+            schedule[time_slot].append(task_info)
+        else:
+            schedule[time_slot] = [task_info]
+
+    # Sorting the schedule dictionary by keys (time slots)
+    return {slot: schedule[slot] for slot in sorted(schedule.keys())}
+
+
+def make_solver(solver='PULP_CBC_CMD', time_limit=None, gap=None, threads=None, msg=True, warm_start=False):
+    # Build a PuLP solver by name, passing only the options that were asked for; solver instances pass through
+    if isinstance(solver, pulp.LpSolver):
+        return solver
+    options = {'msg': msg}
+    if time_limit is not None:
+        options['timeLimit'] = time_limit
+    if gap is not None:
+        options['gapRel'] = gap
+    if threads is not None:
+        options['threads'] = threads
+    if warm_start:
+        options['warmStart'] = True
+    return pulp.getSolver(solver, **options)
+
+
+def has_solution(problem):
+    # Optimal, or stopped early (time limit, gap) with a feasible incumbent. The values are checked as well:
+    # CBC stopped by a limit can report Optimal with fractional values of an infeasible postprocessed model.
+    return ((pulp.LpStatus[problem.status] == "Optimal"
+             or problem.sol_status in (pulp.LpSolutionOptimal, pulp.LpSolutionIntegerFeasible))
+            and problem.valid(FEASIBILITY_TOLERANCE))
+
+
+def pulp_solve(jobs, dependencies, resource_mode=None, formulation='continuous', bucket_size=1,
+               company_calendar=None, resource_calendars=None, initial_starts=None, solver='PULP_CBC_CMD',
+               time_limit=None, gap=None, threads=None, msg=True):
+    with profiling.span("model_build", resource_mode=resource_mode, formulation=formulation, jobs=len(jobs)):
+        problem, start_times, end_times = build_model(jobs, dependencies, resource_mode, formulation, bucket_size,
+                                           company_calendar, resource_calendars, initial_starts)
+    profiling.count("constraints", len(problem.constraints))
+    profiling.count("variables", problem.numVariables())
+    # A warm start is only passed to the solver when it satisfies the model, and then doubles as the fallback
+    warm_schedule = None
+    if initial_starts is not None and problem.valid(FEASIBILITY_TOLERANCE):
+        warm_schedule = format_schedule(jobs, start_times, end_times)
+    # Solve the problem
+    with profiling.span("solve", solver=solver):
+        problem.solve(make_solver(solver, time_limit, gap, threads, msg, warm_schedule is not None))
+    if has_solution(problem):
+        # Returning the formatted_schedule, which is the best incumbent when a limit stopped the search
+        return format_schedule(jobs, start_times, end_times)
+    return warm_schedule
 
 
 # Output the results
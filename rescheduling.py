@@ -0,0 +1,138 @@
+from bisect import bisect_right
+
+from calendar_scheduler import calendar_lookup
+from precedence import PrecedenceGraph
+
+
+class ScheduleDelta:
+    # One shop-floor event, or several at once, against a previous schedule: new or changed jobs (matched by
+    # id), removed job ids and resource breakdowns as {resource: [(start, end), ...]}. time is when the
+    # event happens; rescheduled jobs do not start before it.
+    def __init__(self, changed_jobs=(), removed_jobs=(), resource_downtime=None, time=0):
+        self.changed_jobs = list(changed_jobs)
+        self.removed_jobs = set(removed_jobs)
+        self.resource_downtime = resource_downtime if resource_downtime is not None else {}
+        self.time = time
+
+
+def _job_signature(job):
+    return (job.name, job.min_duration, job.max_duration, dict(job.resource_requirements),
+            list(job.dependencies), job.deadline)
+
+
+def diff_jobs(previous_jobs, jobs, time=0):
+    # Delta between two job lists, e.g. a scheduled list and a fresh parse of changed work orders
+    previous = {job.id: _job_signature(job) for job in previous_jobs}
+    current_ids = {job.id for job in jobs}
+    return ScheduleDelta(changed_jobs=[job for job in jobs if previous.get(job.id) != _job_signature(job)],
+                         removed_jobs=[job_id for job_id in previous if job_id not in current_ids],
+                         time=time)
+
+
+class ResourceTimeline:
+    # Busy intervals of one resource, merged and sorted, with a bisect lookup of the first clash
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+
+    def conflict(self, start, end):
+        # End of a busy interval overlapping [start, end), or None when the resource is free
+        i = bisect_right(self.starts, start)
+        if i > 0 and self.ends[i - 1] > start:
+            return self.ends[i - 1]
+        if i < len(self.starts) and self.starts[i] < end:
+            return self.ends[i]
+        return None
+
+    def reserve(self, start, end):
+        if end <= start:
+            return
+        i = bisect_right(self.starts, start)
+        if i > 0 and self.ends[i - 1] >= start:
+            i -= 1
+            start = self.starts[i]
+        j = i
+        while j < len(self.starts) and self.starts[j] <= end:
+            end = max(end, self.ends[j])
+            j += 1
+        self.starts[i:j] = [start]
+        self.ends[i:j] = [end]
+
+
+def affected_jobs(jobs, delta, graph=None):
+    # Ids of the jobs a delta forces to move: changed and unscheduled jobs, jobs overlapping a breakdown of
+    # one of their resources, successors of removed jobs, and the whole downstream cone of all of these
+    graph = graph if graph is not None else PrecedenceGraph(jobs)
+    seeds = [job.id for job in delta.changed_jobs]
+    for job in jobs:
+        if job.id in delta.removed_jobs:
+            continue
+        if job.start_time is None or job.end_time is None:
+            seeds.append(job.id)
+        if any(dependency in delta.removed_jobs for dependency in job.dependencies):
+            seeds.append(job.id)
+        for resource, periods in delta.resource_downtime.items():
+            if resource in job.resource_requirements and job.end_time is not None and any(
+                    job.end_time > start and job.start_time < end for start, end in periods):
+                seeds.append(job.id)
+
+    affected = set()
+    stack = [job_id for job_id in seeds if job_id not in delta.removed_jobs]
+    while stack:
+        job_id = stack.pop()
+        if job_id not in affected:
+            affected.add(job_id)
+            stack.extend(graph.successors(job_id))
+    return affected
+
+
+def reschedule(previous_schedule, delta, company_calendar=None, resource_calendars=None):
+    # Repair a previous schedule (jobs with start and end times) after a delta instead of replanning it:
+    # only affected_jobs are moved, every other job keeps its interval and blocks its resources. Moved jobs
+    # keep their previous relative order (new jobs go last) and are inserted at the earliest time after
+    # delta.time and their dependencies at which all their resources are free and working for the whole
+    # job. Returns the updated job list.
+    jobs_by_id = {job.id: job for job in previous_schedule if job.id not in delta.removed_jobs}
+    for job in delta.changed_jobs:
+        jobs_by_id[job.id] = job
+    jobs = list(jobs_by_id.values())
+    graph = PrecedenceGraph(jobs)
+    affected = affected_jobs(jobs, delta, graph)
+    calendar_for = calendar_lookup(company_calendar, resource_calendars)
+
+    timelines = {}
+    for resource, periods in delta.resource_downtime.items():
+        for start, end in periods:
+            timelines.setdefault(resource, ResourceTimeline()).reserve(start, end)
+    for job in jobs:
+        if job.id not in affected:
+            for resource in job.resource_requirements:
+                timelines.setdefault(resource, ResourceTimeline()).reserve(job.start_time, job.end_time)
+
+    def previous_start(job):
+        return job.start_time if job.start_time is not None else float('inf')
+
+    previous_starts = {job_id: previous_start(jobs_by_id[job_id]) for job_id in affected}
+    for job_id in graph.priority_order(lambda job: previous_starts.get(job.id, 0)):
+        if job_id not in affected:
+            continue
+        job = jobs_by_id[job_id]
+        job.actual_duration = (job.min_duration + job.max_duration) / 2
+        calendar = calendar_for(job)
+        start = max([graph.job(dep).end_time for dep in graph.predecessors(job_id)] + [delta.time])
+        while True:
+            if calendar is not None:
+                start = calendar.next_working_time(start)
+            end = calendar.add_working_time(start, job.actual_duration) if calendar is not None \
+                else start + job.actual_duration
+            clashes = [timelines[resource].conflict(start, end) for resource in job.resource_requirements
+                       if resource in timelines]
+            clashes = [clash for clash in clashes if clash is not None]
+            if not clashes:
+                break
+            start = max(clashes)
+        job.start_time = start
+        job.end_time = end
+        for resource in job.resource_requirements:
+            timelines.setdefault(resource, ResourceTimeline()).reserve(start, end)
+    return jobs
@@ -0,0 +1,87 @@
+from calendar_scheduler import calendar_lookup
+from deap_solver_dependency import ScheduleSolver
+from pipeline import to_pulp_input
+from precedence import PrecedenceGraph
+from pulp_solver import pulp_solve
+
+BACKENDS = ('pso', 'pulp')
+
+
+def planning_sequence(jobs, graph=None):
+    # Jobs ordered by dependency level, then deadline (jobs without one last), then input order.
+    # Every job comes after all of its dependencies, so any prefix of the sequence can be committed.
+    graph = graph if graph is not None else PrecedenceGraph(jobs)
+    levels = {}
+    for job_id in graph.order:
+        levels[job_id] = 1 + max((levels[dep] for dep in graph.predecessors(job_id)), default=0)
+    return sorted(jobs, key=lambda job: (levels[job.id], job.deadline is None,
+                                         job.deadline if job.deadline is not None else 0, graph.index(job.id)))
+
+
+def _pso_starts(solver, window, company_calendar, resource_calendars):
+    solver.solve(window, company_calendar, resource_calendars)
+    return {job.id: job.start_time for job in window}
+
+
+def pulp_start_times(jobs, **options):
+    # Start time per job id from pulp_solve, empty when it finds no schedule
+    pulp_jobs, dependencies = to_pulp_input(jobs)
+    schedule = pulp_solve(pulp_jobs, dependencies, **options)
+    if schedule is None:
+        return {}
+    return {task['task_id']: task['start_time'] for tasks in schedule.values() for task in tasks}
+
+
+def rolling_horizon_schedule(jobs, company_calendar=None, resource_calendars=None, backend='pso', window_size=200,
+                             overlap=50, **options):
+    # Schedule a plan too large for one model: take the next window_size jobs of the planning sequence,
+    # solve only those with the backend ('pso' or 'pulp', options go to ScheduleSolver or pulp_solve), and
+    # commit the window_size - overlap jobs the backend starts first. Committed jobs are placed after
+    # everything committed before them and never move again; the overlap is solved again with the next
+    # window. Model size is bounded by window_size whatever the size of the plan.
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend!r}, expected one of {BACKENDS}")
+    if not 0 <= overlap < window_size:
+        raise ValueError("overlap must be at least 0 and smaller than window_size")
+
+    graph = PrecedenceGraph(jobs)
+    sequence = planning_sequence(jobs, graph)
+    calendar_for = calendar_lookup(company_calendar, resource_calendars)
+    solver = ScheduleSolver(**options) if backend == 'pso' else None
+
+    resource_free = {}
+    carried = []
+    cursor = 0
+    try:
+        while carried or cursor < len(sequence):
+            window = carried + sequence[cursor:cursor + window_size - len(carried)]
+            cursor += len(window) - len(carried)
+            if solver is not None:
+                starts = _pso_starts(solver, window, company_calendar, resource_calendars)
+            else:
+                starts = pulp_start_times(window, **options)
+
+            # Commit the earliest jobs the backend found; dependencies of a job are committed before it
+            window_graph = PrecedenceGraph(window)
+            order = window_graph.priority_order(lambda job: starts.get(job.id, float('inf')))
+            commit_count = len(window) if cursor == len(sequence) else len(window) - overlap
+            committed = set(order[:commit_count])
+            for job_id in order[:commit_count]:
+                job = window_graph.job(job_id)
+                job.actual_duration = (job.min_duration + job.max_duration) / 2
+                ready = max([graph.job(dep).end_time for dep in graph.predecessors(job_id)] +
+                            [resource_free.get(resource, 0) for resource in job.resource_requirements] + [0])
+                calendar = calendar_for(job)
+                if calendar is None:
+                    job.start_time = ready
+                    job.end_time = ready + job.actual_duration
+                else:
+                    job.start_time = calendar.next_working_time(ready)
+                    job.end_time = calendar.add_working_time(job.start_time, job.actual_duration)
+                for resource in job.resource_requirements:
+                    resource_free[resource] = job.end_time
+            carried = [job for job in window if job.id not in committed]
+    finally:
+        if solver is not None:
+            solver.close()
+    return jobs
@@ -0,0 +1,119 @@
+import hashlib
+import inspect
+import json
+import os
+import pickle
+from collections import OrderedDict
+from datetime import date, datetime
+
+# Part of every fingerprint; bump it when the key payload or the stored value changes, so entries an older
+# version left in a cache directory are never read back
+CACHE_FORMAT = 2
+
+# Attributes the solvers write; they are results, not part of the problem
+OUTPUT_FIELDS = frozenset(('start_time', 'end_time', 'actual_duration'))
+
+
+def _attributes(value):
+    names = list(getattr(value, '__dict__', {}))
+    for cls in type(value).__mro__:
+        names.extend(name for name in getattr(cls, '__slots__', ()) if name not in names)
+    return {name: getattr(value, name) for name in names
+            if not name.startswith('_') and name not in OUTPUT_FIELDS and hasattr(value, name)}
+
+
+def canonical(value):
+    # JSON-serializable form of jobs, calendars and parameters: dict keys and sets sorted, objects reduced to
+    # their public non-output attributes plus their class name, cached indexes (underscore attributes) left out
+    if value is None or isinstance(value, (bool, int, str)):
+        return value
+    if isinstance(value, float):
+        return repr(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return sorted([canonical(key), canonical(item)] for key, item in value.items())
+    if isinstance(value, (set, frozenset)):
+        return sorted(canonical(item) for item in value)
+    if isinstance(value, (list, tuple)):
+        return [canonical(item) for item in value]
+    if hasattr(value, 'tolist'):
+        return canonical(value.tolist())
+    if callable(value):
+        return f"{getattr(value, '__module__', '')}.{getattr(value, '__qualname__', repr(value))}"
+    return [type(value).__name__, canonical(_attributes(value))]
+
+
+def fingerprint(jobs, company_calendar=None, resource_calendars=None, parameters=None):
+    # Content hash of a scheduling problem and the solver settings used on it
+    payload = canonical([CACHE_FORMAT, jobs, company_calendar, resource_calendars, parameters])
+    return hashlib.sha256(json.dumps(payload, separators=(',', ':')).encode()).hexdigest()
+
+
+class ScheduleCache:
+    # Schedules by fingerprint: an in-memory LRU of max_entries, backed by one pickle per entry in directory
+    # when one is given, so results survive restarts. Disk hits are promoted into memory.
+    def __init__(self, max_entries=32, directory=None):
+        self.max_entries = max_entries
+        self.directory = directory
+        self.entries = OrderedDict()
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.pickle')
+
+    def get(self, key):
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            return self.entries[key]
+        if self.directory is None:
+            return None
+        try:
+            with open(self._path(key), 'rb') as file:
+                value = pickle.load(file)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        self._remember(key, value)
+        return value
+
+    def put(self, key, value):
+        self._remember(key, value)
+        if self.directory is not None:
+            # Write to a temporary file first so a crash never leaves a truncated entry behind
+            temporary = self._path(key) + '.tmp'
+            with open(temporary, 'wb') as file:
+                pickle.dump(value, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary, self._path(key))
+
+    def _remember(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+        if self.directory is not None:
+            for name in os.listdir(self.directory):
+                if name.endswith('.pickle'):
+                    os.remove(os.path.join(self.directory, name))
+
+
+def cached_production_schedule(cache, solve, jobs, company_calendar, resource_calendars, **parameters):
+    # solve(jobs, company_calendar, resource_calendars, **parameters) through the cache. Only the job times
+    # are stored; on a hit they are written onto the given (freshly parsed) jobs. The key covers every
+    # setting solve runs with, defaults included, so passing a default explicitly hits the same entry and a
+    # changed default misses.
+    arguments = inspect.signature(solve).bind(jobs, company_calendar, resource_calendars, **parameters)
+    arguments.apply_defaults()
+    settings = dict(list(arguments.arguments.items())[3:])
+    key = fingerprint(jobs, company_calendar, resource_calendars, [solve, settings])
+    times = cache.get(key)
+    if times is None:
+        jobs = solve(jobs, company_calendar, resource_calendars, **parameters)
+        cache.put(key, {job.id: (job.start_time, job.end_time, job.actual_duration) for job in jobs})
+        return jobs
+    for job in jobs:
+        job.start_time, job.end_time, job.actual_duration = times[job.id]
+    return jobs
@@ -0,0 +1,149 @@
+import math
+import time
+
+import numpy as np
+
+import profiling
+
+
+def dominates_lexicographic(wvalues, other_wvalues):
+    # Row-wise equivalent of DEAP's Fitness.__gt__: compare weighted values column by column
+    greater = np.zeros(len(wvalues), dtype=bool)
+    equal = np.ones(len(wvalues), dtype=bool)
+    for column in range(wvalues.shape[1]):
+        greater |= equal & (wvalues[:, column] > other_wvalues[:, column])
+        equal &= wvalues[:, column] == other_wvalues[:, column]
+    return greater
+
+
+def best_index(wvalues):
+    # Index of the lexicographically best row (first one on ties)
+    return np.lexsort((-wvalues).T[::-1])[0]
+
+
+def seed_sequence(seed=None):
+    # SeedSequence behind a seed= argument: None draws fresh entropy, an int or a SeedSequence is reproducible
+    return seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+
+
+def spawn_generators(seed, count):
+    # Independent, non-overlapping generators, e.g. one per restart or worker
+    return [np.random.default_rng(child) for child in seed_sequence(seed).spawn(count)]
+
+
+def population_size_for(dimensions, minimum=10, maximum=100):
+    # Standard PSO 2007 rule of thumb: 10 + 2 * sqrt(dimensions) particles, within [minimum, maximum]
+    return max(minimum, min(maximum, int(10 + 2 * math.sqrt(dimensions))))
+
+
+def target_reached(wvalues, target, weights):
+    # True when weighted values are at least as good as target (in DEAP's lexicographic order)
+    target_wvalues = np.asarray(target, dtype=float)[None, :] * np.asarray(weights, dtype=float)
+    return not dominates_lexicographic(target_wvalues, wvalues)[0]
+
+
+class Swarm:
+    # Particle swarm stored as 2-D arrays (one row per particle, one column per job),
+    # so a whole iteration is a handful of array operations instead of nested Python loops
+    def __init__(self, size, dimensions, pmin, pmax, weights, inertia=0.5, cognitive_weight=1.5,
+                 social_weight=1.5, rng=None):
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.size = size
+        self.dimensions = dimensions
+        self.weights = np.asarray(weights, dtype=float)
+        self.inertia = inertia
+        self.cognitive_weight = cognitive_weight
+        self.social_weight = social_weight
+
+        # Buffers are allocated once and refilled by reset(), so a swarm can be reused across solves
+        self.pmin = np.empty(dimensions)
+        self.pmax = np.empty(dimensions)
+        self.positions = np.empty((size, dimensions))
+        self.speeds = np.empty((size, dimensions))
+        self.best_positions = np.empty((size, dimensions))
+        self.reset(pmin, pmax)
+
+    def reset(self, pmin, pmax):
+        # Scatter the particles again within new bounds and forget all bests
+        self.pmin[:] = pmin
+        self.pmax[:] = pmax
+        self.rng.random(out=self.positions)
+        self.positions *= self.pmax - self.pmin
+        self.positions += self.pmin
+        self.rng.random(out=self.speeds)
+        self.speeds *= 2
+        self.speeds -= 1
+
+        # Personal bests (per row) and the global best (single row), filled by the first update()
+        self.best_positions[:] = self.positions
+        self.best_fitness = None
+        self.best_wvalues = None
+        self.global_best = None
+        self.global_best_fitness = None
+        self.global_best_wvalues = None
+
+    def update(self, fitness):
+        # Record the fitness (N x objectives) of the current positions and refresh the bests
+        fitness = np.asarray(fitness, dtype=float)
+        wvalues = fitness * self.weights
+        if self.best_wvalues is None:
+            improved = np.ones(self.size, dtype=bool)
+            self.best_fitness = fitness.copy()
+            self.best_wvalues = wvalues.copy()
+        else:
+            improved = dominates_lexicographic(wvalues, self.best_wvalues)
+        self.best_positions[improved] = self.positions[improved]
+        self.best_fitness[improved] = fitness[improved]
+        self.best_wvalues[improved] = wvalues[improved]
+
+        index = best_index(self.best_wvalues)
+        candidate = self.best_wvalues[index:index + 1]
+        if self.global_best_wvalues is None or dominates_lexicographic(candidate, self.global_best_wvalues)[0]:
+            self.global_best = self.best_positions[index].copy()
+            self.global_best_fitness = self.best_fitness[index].copy()
+            self.global_best_wvalues = candidate.copy()
+        return improved
+
+    def step(self):
+        # Move every particle at once: one batch of random draws per term, then clip to bounds
+        r1 = self.rng.random((self.size, self.dimensions))
+        r2 = self.rng.random((self.size, self.dimensions))
+        self.speeds *= self.inertia
+        self.speeds += self.cognitive_weight * r1 * (self.best_positions - self.positions)
+        self.speeds += self.social_weight * r2 * (self.global_best - self.positions)
+        self.positions += self.speeds
+        np.clip(self.positions, self.pmin, self.pmax, out=self.positions)
+
+
+def optimize(make_swarm, evaluate, iterations, patience=None, time_budget=None, target=None):
+    # Run one swarm and return its global best position and fitness. The run stops after iterations
+    # iterations (None for no limit), after patience iterations without a better global best, once
+    # time_budget seconds have passed, or as soon as the global best is at least as good as target.
+    if iterations is None and patience is None and time_budget is None and target is None:
+        raise ValueError("optimize needs at least one stopping criterion")
+    deadline = time.perf_counter() + time_budget if time_budget is not None else None
+    swarm = make_swarm()
+    swarm.update(evaluate(swarm.positions))
+    iteration = stagnant = 0
+    reason = 'iterations'
+    while iterations is None or iteration < iterations:
+        if target is not None and target_reached(swarm.global_best_wvalues, target, swarm.weights):
+            reason = 'target'
+            break
+        if patience is not None and stagnant >= patience:
+            reason = 'stagnation'
+            break
+        if deadline is not None and time.perf_counter() >= deadline:
+            reason = 'time_budget'
+            break
+        # Update speed and position of the whole swarm, then evaluate the new positions
+        previous_best = swarm.global_best_wvalues
+        with profiling.span("pso_iteration", iteration=iteration):
+            swarm.step()
+            swarm.update(evaluate(swarm.positions))
+        # update() replaces the global best arrays only when the global best improves
+        stagnant = 0 if swarm.global_best_wvalues is not previous_best else stagnant + 1
+        profiling.trace("pso_convergence", iteration=iteration, best=swarm.global_best_fitness)
+        iteration += 1
+    profiling.trace("pso_stop", iterations=iteration, reason=reason)
+    return swarm.global_best, swarm.global_best_fitness
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from decoder import DecodingProblem, decode, decode_population
+from deap_solver_dependency import UncertainProductionJob
+
+
+def random_problem(rng, grouped=False):
+    # Random DAG over up to 40 jobs: each job uses up to 3 of up to 6 resources, about half have a deadline
+    size = int(rng.integers(1, 41))
+    resources = int(rng.integers(1, 7))
+    return DecodingProblem(
+        durations=rng.integers(1, 10, size) / rng.choice([1, 2, 3]),
+        deadlines=np.where(rng.random(size) < 0.5, rng.integers(5, 60, size), np.nan),
+        job_resources=[rng.choice(resources, int(rng.integers(0, min(3, resources) + 1)), replace=False)
+                       for _ in range(size)],
+        successors=[np.flatnonzero(rng.random(size - job - 1) < 3 / size) + job + 1 for job in range(size)],
+        groups=rng.integers(0, 3, size) if grouped else None,
+    )
+
+
+def assert_decoders_agree(positions, problem):
+    starts, ends = decode_population(positions, problem)
+    for row, priorities in enumerate(positions):
+        reference_starts, reference_ends = decode(priorities, problem)
+        np.testing.assert_array_equal(starts[row], reference_starts)
+        np.testing.assert_array_equal(ends[row], reference_ends)
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_population_kernel_matches_reference(seed):
+    rng = np.random.default_rng(seed)
+    problem = random_problem(rng, grouped=seed % 2 == 1)
+    # Rounded priorities produce plenty of ties
+    positions = np.round(rng.uniform(-2, 2, (16, problem.size)), seed % 3)
+    assert_decoders_agree(positions, problem)
+
+
+def test_duplicated_dependencies_count_once():
+    jobs = [UncertainProductionJob(1, "Job1", 2, 4, {"resource1": 1}),
+            UncertainProductionJob(2, "Job2", 1, 3, {"resource2": 1}, dependencies=[1, 1])]
+    problem = DecodingProblem.from_jobs(jobs)
+    assert problem.predecessor_counts == [0, 1]
+    positions = np.random.default_rng(0).uniform(-1, 1, (4, 2))
+    assert_decoders_agree(positions, problem)
+    starts, ends = decode_population(positions, problem)
+    assert (starts[:, 1] == ends[:, 0]).all()
+
+
+def test_cycle_is_rejected_by_both_decoders():
+    problem = DecodingProblem(durations=[1, 1], deadlines=[np.nan, np.nan], job_resources=[[0], [0]],
+                              successors=[[1], [0]])
+    with pytest.raises(ValueError, match="cycle"):
+        decode([0.0, 0.0], problem)
+    with pytest.raises(ValueError, match="cycle"):
+        decode_population(np.zeros((2, 2)), problem)
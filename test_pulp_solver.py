@@ -0,0 +1,62 @@
+import pulp
+
+from production_calendar import ProductionCalendar
+from pulp_solver import build_model, pulp_solve
+
+JOBS = {
+    1: {'duration': 3, 'resource': 'A', 'level': 1, 'name': 'Job_A'},
+    2: {'duration': 2, 'resource': 'B', 'level': 2, 'name': 'Job_B'},
+    3: {'duration': 4, 'resource': 'A', 'level': 2, 'name': 'Job_C'},
+}
+DEPENDENCIES = [(1, 2), (1, 3)]
+
+
+class FractionalIncumbentSolver(pulp.LpSolver):
+    # Reports an integer-feasible incumbent whose values break the model, as CBC does when a time limit
+    # stops it on an infeasible postprocessed model
+    def actualSolve(self, lp, **kwargs):
+        for var in lp.variables():
+            var.varValue = 0.5 if var.cat == pulp.LpInteger else 0.0
+        lp.assignStatus(pulp.LpStatusOptimal, pulp.LpSolutionIntegerFeasible)
+        return lp.status
+
+
+def schedule_starts(schedule):
+    return {task['task_id']: task['start_time'] for tasks in schedule.values() for task in tasks}
+
+
+def test_solution_is_returned():
+    starts = schedule_starts(pulp_solve(JOBS, DEPENDENCIES, resource_mode='disjunctive', msg=False))
+    assert starts[2] >= starts[1] + 3 and starts[3] >= starts[1] + 3
+
+
+def test_infeasible_incumbent_is_rejected():
+    assert pulp_solve(JOBS, DEPENDENCIES, resource_mode='disjunctive', solver=FractionalIncumbentSolver()) is None
+
+
+def test_infeasible_incumbent_falls_back_to_warm_start():
+    initial_starts = {1: 0, 2: 3, 3: 3}
+    schedule = pulp_solve(JOBS, DEPENDENCIES, resource_mode='disjunctive', initial_starts=initial_starts,
+                          solver=FractionalIncumbentSolver())
+    assert schedule_starts(schedule) == initial_starts
+
+
+def test_time_indexed_jobs_continue_across_breaks():
+    calendar = ProductionCalendar([(8, 12), (13, 17)])
+    jobs = {1: {'duration': 6.5, 'resource': 'A', 'level': 1, 'name': 'Job_A'},
+            2: {'duration': 2.5, 'resource': 'A', 'level': 2, 'name': 'Job_B'}}
+    schedule = pulp_solve(jobs, [(1, 2)], formulation='time_indexed', company_calendar=calendar, msg=False)
+    times = {task['task_id']: (task['start_time'], task['end_time']) for tasks in schedule.values() for task in tasks}
+    # 4 h before the lunch break and 2.5 h after it; then 1 h on day 0 and 1.5 h on day 1
+    assert times == {1: (8, 15.5), 2: (16, 33.5)}
+
+
+def test_time_indexed_warm_start_is_feasible_with_fractional_durations():
+    calendar = ProductionCalendar([(8, 12), (13, 17)])
+    jobs = {1: {'duration': 6.5, 'resource': 'A', 'level': 1, 'name': 'Job_A'},
+            2: {'duration': 2.5, 'resource': 'A', 'level': 2, 'name': 'Job_B'},
+            3: {'duration': 9, 'resource': 'B', 'level': 2, 'name': 'Job_C'}}
+    problem, start_times, end_times = build_model(jobs, [(1, 2), (1, 3)], formulation='time_indexed',
+                                                  company_calendar=calendar,
+                                                  initial_starts={1: 0.3, 2: 6.8, 3: 6.8})
+    assert problem.valid(1e-6)